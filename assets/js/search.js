@@ -0,0 +1,158 @@
+// Client-side search over the index the build writes to search/
+
+(function() {
+
+    // Loads the index lazily: index.json first, then only the shards and
+    // document files a query needs. Every file is fetched at most once.
+    function SymposiumSearch(indexUrl) {
+        this.indexUrl = new URL(indexUrl, document.baseURI);
+        // Document URLs are relative to the edition root, one level up
+        this.rootUrl = new URL('../', this.indexUrl);
+        this.files = {};
+    }
+
+    SymposiumSearch.prototype.load = function(name) {
+        if (!this.files[name]) {
+            this.files[name] = fetch(new URL(name, this.indexUrl)).then(function(response) {
+                if (!response.ok) {
+                    throw new Error('Could not load search file ' + name);
+                }
+                return response.json();
+            });
+        }
+        return this.files[name];
+    };
+
+    // Same folding as the build: special letters, then accents, then case
+    SymposiumSearch.prototype.tokens = function(meta, text) {
+        const folded = Array.from(text, function(c) { return meta.fold[c] || c; }).join('')
+            .normalize('NFKD')
+            .replace(/[^\x00-\x7f]/g, '')
+            .toLowerCase();
+        return folded.split(/[^a-z0-9]+/).filter(Boolean);
+    };
+
+    // Ids of every document with a term starting with ``token``
+    SymposiumSearch.prototype.matches = function(meta, token) {
+        const key = token.slice(0, meta.prefix);
+        const shards = Object.keys(meta.shards).filter(function(name) { return name.startsWith(key); });
+        const self = this;
+        return Promise.all(shards.map(function(name) { return self.load(meta.shards[name]); }))
+            .then(function(loaded) {
+                const found = new Map();
+                loaded.forEach(function(shard) {
+                    // Binary search for the first term >= token
+                    let low = 0;
+                    let high = shard.terms.length;
+                    while (low < high) {
+                        const mid = (low + high) >> 1;
+                        if (shard.terms[mid] < token) {
+                            low = mid + 1;
+                        } else {
+                            high = mid;
+                        }
+                    }
+                    for (let i = low; i < shard.terms.length && shard.terms[i].startsWith(token); i++) {
+                        const exact = shard.terms[i] === token;
+                        let id = 0;
+                        shard.postings[i].forEach(function(delta) {
+                            id += delta;
+                            found.set(id, (found.get(id) || 0) + (exact ? 2 : 1));
+                        });
+                    }
+                });
+                return found;
+            });
+    };
+
+    // Documents matching every word of the query, best matches first
+    SymposiumSearch.prototype.query = function(text, limit) {
+        const self = this;
+        return this.load('index.json').then(function(meta) {
+            const tokens = self.tokens(meta, text);
+            if (!tokens.length) {
+                return [];
+            }
+            return Promise.all(tokens.map(function(token) { return self.matches(meta, token); }))
+                .then(function(sets) {
+                    let scores = sets[0];
+                    sets.slice(1).forEach(function(set) {
+                        const both = new Map();
+                        scores.forEach(function(score, id) {
+                            if (set.has(id)) {
+                                both.set(id, score + set.get(id));
+                            }
+                        });
+                        scores = both;
+                    });
+                    const ids = Array.from(scores.keys())
+                        .sort(function(a, b) { return scores.get(b) - scores.get(a) || a - b; })
+                        .slice(0, limit);
+                    const files = Array.from(new Set(ids.map(function(id) {
+                        return Math.floor(id / meta.docs_per_file);
+                    })));
+                    return Promise.all(files.map(function(n) { return self.load(meta.docs[n]); }))
+                        .then(function(loaded) {
+                            const chunks = new Map(files.map(function(n, i) { return [n, loaded[i]]; }));
+                            return ids.map(function(id) {
+                                const doc = chunks.get(Math.floor(id / meta.docs_per_file))[id % meta.docs_per_file];
+                                return {kind: doc[0], title: doc[1], url: new URL(doc[2], self.rootUrl).href, detail: doc[3]};
+                            });
+                        });
+                });
+        });
+    };
+
+    function resultItem(result) {
+        const link = document.createElement('a');
+        link.className = 'list-group-item list-group-item-action d-flex align-items-center';
+        link.href = result.url;
+
+        const badge = document.createElement('span');
+        badge.className = 'badge bg-secondary me-2 text-capitalize';
+        badge.textContent = result.kind;
+        link.appendChild(badge);
+
+        const title = document.createElement('span');
+        title.textContent = result.title;
+        link.appendChild(title);
+
+        if (result.detail) {
+            const detail = document.createElement('small');
+            detail.className = 'text-muted ms-auto ps-2 text-end';
+            detail.textContent = result.detail;
+            link.appendChild(detail);
+        }
+        return link;
+    }
+
+    document.addEventListener('DOMContentLoaded', function() {
+        document.querySelectorAll('[data-search-index]').forEach(function(box) {
+            const input = box.querySelector('input[type="search"]');
+            const list = box.querySelector('.search-results');
+            const search = new SymposiumSearch(box.getAttribute('data-search-index'));
+            let latest = 0;
+
+            input.addEventListener('input', function() {
+                const ticket = ++latest;
+                search.query(input.value, 20).then(function(results) {
+                    // Ignore answers to queries the user has already typed past
+                    if (ticket !== latest) {
+                        return;
+                    }
+                    list.replaceChildren.apply(list, results.map(resultItem));
+                    if (!results.length && input.value.trim()) {
+                        const empty = document.createElement('div');
+                        empty.className = 'list-group-item text-muted';
+                        empty.textContent = 'No matches';
+                        list.appendChild(empty);
+                    }
+                }).catch(function(error) {
+                    console.warn(error);
+                });
+            });
+        });
+    });
+
+    window.SymposiumSearch = SymposiumSearch;
+})();
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the European Mobility Symposium site generators
+Builds synthetic symposium datasets of increasing size with StaticSiteGenerator
+(build.py) and SiteBuilder (exported-assets/build.py) and records the results as JSON
+"""
+
+import os
+import sys
+import json
+import yaml
+import shutil
+import platform
+import subprocess
+import tempfile
+import time
+import random
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).parent.absolute()
+
+# Files each generator needs to build, relative to its project directory
+PROJECTS = {
+    "StaticSiteGenerator": {
+        "root": ROOT,
+        "files": ["build.py", "sitegen", "config.yaml", "templates", "assets", "content"],
+        "cold": ["build.py"],
+        "warm": ["build.py"],
+        "noop": ["build.py", "--incremental"],
+    },
+    "SiteBuilder": {
+        "root": ROOT / "exported-assets",
+        "files": ["build.py", "config.yaml", "templates", "assets", "content", "sponsors", "upper_image"],
+        # Shared modules from the repository root that build.py imports
+        "shared": ["sitegen"],
+        "cold": ["build.py", "build", "--clean"],
+        "warm": ["build.py", "build", "--clean"],
+        "noop": ["build.py", "build"],
+    },
+}
+
+FIRST_NAMES = ["Márton", "Elisa", "Balázs", "Gergő", "Sebastiano", "Bruno", "Massimiliano", "Riccardo",
+               "Andrea", "Antonio", "Leo", "Kyriaki", "Mattia", "Rossano", "Giuliano", "Paolo",
+               "Giovanni", "Mirco", "Luca", "José", "Zoë", "Søren", "Łukasz", "Inès"]
+LAST_NAMES = ["Karsai", "Omodei", "Lengyel", "Pintér", "Bontorin", "Lepri", "Luca", "Gallotti",
+              "Guizzo", "Desiderio", "Ferres", "Kalimeri", "Mazzoli", "Schifanella", "Cornacchia",
+              "De Biase", "Mauro", "Nanni", "Pappalardo", "Ramasco", "Müller", "Østergaard", "Nowak"]
+INSTITUTION_KINDS = ["University of", "Institute for Mobility Research,", "Laboratory of Complex Systems,",
+                     "Foundation for Data Science,", "Centre for Urban Studies,"]
+CITIES = ["Turin", "Pisa", "Vienna", "Budapest", "Trento", "London", "Palma", "Boston", "Kraków",
+          "Lyon", "København", "Zürich"]
+
+
+def synthetic_symposium(base, participants, institutions=None, sponsors=None, seed=0):
+    """Return a copy of ``base`` with generated participants, institutions and sponsors"""
+    rng = random.Random(seed)
+    institutions = institutions or max(1, participants // 8)
+    sponsors = sponsors if sponsors is not None else min(500, max(10, participants // 100))
+    data = json.loads(json.dumps(base))
+
+    groups = [{"institution": f"{rng.choice(INSTITUTION_KINDS)} {rng.choice(CITIES)} #{i + 1}", "people": []}
+              for i in range(institutions)]
+    for i in range(participants):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i + 1}"
+        groups[i % institutions]["people"].append(name)
+    data["participants"] = [group for group in groups if group["people"]]
+
+    logos = [sponsor["logo"] for sponsor in base.get("sponsors") or []]
+    data["sponsors"] = [
+        {"name": f"Sponsor {i + 1}", "logo": logos[i % len(logos)] if logos else "",
+         "url": f"https://sponsor{i + 1}.example.org"}
+        for i in range(sponsors)
+    ]
+    return data
+
+
+def prepare_project(generator, workdir, data):
+    """Copy a generator's project into ``workdir`` with ``data`` as its symposium content"""
+    spec = PROJECTS[generator]
+    sources = [spec["root"] / name for name in spec["files"]] + [ROOT / name for name in spec.get("shared", ())]
+    for src in sources:
+        name = src.name
+        if src.is_dir():
+            shutil.copytree(src, workdir / name)
+        elif src.exists():
+            shutil.copy2(src, workdir / name)
+    (workdir / "content").mkdir(exist_ok=True)
+    with open(workdir / "content" / "symposium.yaml", "w", encoding="utf-8") as f:
+        yaml.safe_dump(data, f, allow_unicode=True, sort_keys=False)
+
+    # SiteBuilder finds sponsors by listing its sponsors/ directory
+    sponsors_dir = workdir / "sponsors"
+    if generator == "SiteBuilder" and sponsors_dir.is_dir():
+        logos = sorted(path for path in sponsors_dir.iterdir() if path.is_file())
+        for i, sponsor in enumerate(data["sponsors"][len(logos):], start=len(logos)):
+            if logos:
+                logo = logos[i % len(logos)]
+                os.link(logo, sponsors_dir / f"sponsor_{i + 1}{logo.suffix}")
+
+
+def run_build(argv, cwd):
+    """Run one build in a child process; return wall time, peak RSS and exit status"""
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, *argv], cwd=cwd,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    # Closed once read, so long runs over many sizes do not leak descriptors
+    with process.stderr:
+        stderr = process.stderr.read()
+    if hasattr(os, "wait4"):
+        # wait4 reports the resource usage of exactly this child
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        peak_rss = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    else:
+        process.wait()
+        peak_rss = None
+    result = {
+        "seconds": round(time.perf_counter() - started, 4),
+        "peak_rss_bytes": peak_rss,
+        "returncode": process.returncode,
+    }
+    if process.returncode:
+        result["error"] = stderr.decode("utf-8", "replace").strip().splitlines()[-1:]
+    return result
+
+
+def output_size(output_dir):
+    """Total size and number of files in a build's output directory"""
+    sizes = [path.stat().st_size for path in output_dir.rglob("*") if path.is_file()] \
+        if output_dir.exists() else []
+    return sum(sizes), len(sizes)
+
+
+def benchmark(generator, data, repeat=1, keep=False):
+    """Measure cold, warm and no-op builds of one dataset"""
+    workdir = Path(tempfile.mkdtemp(prefix=f"ems-bench-{generator}-"))
+    try:
+        prepare_project(generator, workdir, data)
+        spec = PROJECTS[generator]
+        runs = {}
+        for phase in ("cold", "warm", "noop"):
+            attempts = []
+            for _ in range(repeat):
+                if phase == "cold":
+                    shutil.rmtree(workdir / ".build-cache", ignore_errors=True)
+                    shutil.rmtree(workdir / "output", ignore_errors=True)
+                attempts.append(run_build(spec[phase], workdir))
+            # The fastest run is the least disturbed by the rest of the machine
+            runs[phase] = min(attempts, key=lambda attempt: attempt["seconds"])
+        size, files = output_size(workdir / "output")
+        runs["output_bytes"] = size
+        runs["output_files"] = files
+        return runs
+    finally:
+        if keep:
+            print(f"Kept {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def git_commit():
+    """Current commit of the repository, if it is one"""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current):
+    """Print how each measurement changed relative to an earlier results file"""
+    before = {(r["generator"], r["participants"]): r for r in previous["results"]}
+    print(f"\nChange since {(previous.get('commit') or 'previous run')[:10]}:")
+    for result in current["results"]:
+        old = before.get((result["generator"], result["participants"]))
+        if old is None:
+            continue
+        changes = []
+        for phase in ("cold", "warm", "noop"):
+            old_s, new_s = old[phase]["seconds"], result[phase]["seconds"]
+            if old_s:
+                changes.append(f"{phase} {(new_s - old_s) / old_s * 100:+.0f}%")
+        print(f"  {result['generator']:<20} {result['participants']:>7} participants: {', '.join(changes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the site generators on synthetic symposium data")
+    parser.add_argument("--sizes", default="10,1000,50000",
+                        help="Comma-separated participant counts (default: 10,1000,50000)")
+    parser.add_argument("--generators", nargs="+", choices=sorted(PROJECTS), default=sorted(PROJECTS),
+                        help="Generators to benchmark")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per measurement; the fastest is kept")
+    parser.add_argument("--output", default=None,
+                        help="Results file (default: benchmarks/<commit>.json)")
+    parser.add_argument("--compare", default=None, help="Earlier results file to compare against")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated projects for inspection")
+    args = parser.parse_args()
+
+    with open(ROOT / "content" / "symposium.yaml", "r", encoding="utf-8") as f:
+        base = yaml.safe_load(f)
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": [],
+    }
+    for participants in (int(size) for size in args.sizes.split(",")):
+        data = synthetic_symposium(base, participants)
+        for generator in args.generators:
+            print(f"⏱️  {generator}: {participants} participants, "
+                  f"{len(data['participants'])} institutions, {len(data['sponsors'])} sponsors")
+            runs = benchmark(generator, data, repeat=args.repeat, keep=args.keep)
+            report["results"].append({
+                "generator": generator,
+                "participants": participants,
+                "institutions": len(data["participants"]),
+                "sponsors": len(data["sponsors"]),
+                **runs,
+            })
+            for phase in ("cold", "warm", "noop"):
+                run = runs[phase]
+                rss = f"{run['peak_rss_bytes'] / 1024 ** 2:.0f} MiB" if run["peak_rss_bytes"] else "-"
+                status = "" if not run["returncode"] else f"  ❌ {' '.join(run.get('error', []))}"
+                print(f"   {phase:<5} {run['seconds']:>8.2f} s  peak RSS {rss}{status}")
+            print(f"   output {runs['output_bytes'] / 1024:.0f} KiB in {runs['output_files']} files")
+
+    output = Path(args.output) if args.output else ROOT / "benchmarks" / f"{(commit or 'results')[:12]}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"📁 Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
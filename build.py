@@ -5,39 +5,134 @@ Reproduces the symposium website using Python, Jinja2, and Bootstrap
 """
 
 import os
+import posixpath
 import json
-import yaml
 import shutil
+import hashlib
+import http.server
+import urllib.parse
+import threading
+import time
+from fnmatch import fnmatchcase
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import Environment, FileSystemLoader, TemplateSyntaxError, meta
+from markupsafe import Markup
 import argparse
+import re
 import subprocess
-import sys
+
+from sitegen.assets import AssetStore, AssetSync, Precompressor
+from sitegen.cache import (BuildManifest, ContentCache, SourceHashBytecodeCache, TrackingDict, changed_keys,
+                           context_digest, parse_yaml, stream_if_changed, write_if_changed)
+from sitegen.deploy import DeltaDeployer, DirectoryTarget, GitPagesDeployer
+from sitegen.images import ImageDimensions, ResponsiveImages, SponsorLogos
+from sitegen.minify import HtmlMinifier, html_attributes, minify_css, minify_js, rebase_css_urls
+from sitegen.program import ProgramExtractor
+from sitegen.purge import PageOutline, SelectorUsage, purge_css
+from sitegen.search import SearchIndex, slugify, unique_slugs
+from sitegen.server import DevRequestHandler, LiveReload, MemoryOutput
+from sitegen.tasks import BuildProfiler, TaskGraph
+
 
 class StaticSiteGenerator:
-    def __init__(self, config_file="config.yaml"):
+    # (template, output) pairs rendered with the symposium content
+    pages = [
+        ("index.html", "index.html"),
+    ]
+
+    # Context variable -> content file, loaded for every page
+    content_files = {
+        "symposium": "symposium.yaml",
+    }
+
+    # How often watch mode polls the source tree, in seconds
+    watch_interval = 0.05
+
+    # Templates of the per-institution/per-person collection pages
+    collection_templates = ("institutions.html", "people.html", "institution.html", "person.html")
+
+    # Where --profile writes its Chrome trace, relative to the project
+    profile_trace = "build-trace.json"
+
+    # Minifiers applied to bundled assets, by file extension
+    minifiers = {
+        ".css": minify_css,
+        ".js": minify_js,
+    }
+
+    def __init__(self, config_file="config.yaml", incremental=False, asset_mode="auto", jobs=None,
+                 in_memory=False, profile=False):
         
         self.base_dir = Path(__file__).parent
         self.templates_dir = self.base_dir / "templates"
         self.content_dir = self.base_dir / "content"
         self.assets_dir = self.base_dir / "assets"
         self.output_dir = self.base_dir / "output"
+        self.cache_dir = self.base_dir / ".build-cache"
+
+        # Incremental builds skip outputs whose recorded inputs are unchanged
+        self.incremental = incremental
+        self.manifest = BuildManifest(self.cache_dir / "manifest.json")
+        self.content_cache = ContentCache(self.cache_dir / "content")
+        self.asset_sync = AssetSync(asset_mode)
+        self.jobs = jobs
+        self.config_file = config_file
+        self.config_path = self.base_dir / config_file
+        # Edition name -> context shared by that edition's pages
+        self.edition_data = {}
+        self.rebuild_listeners = []
+
+        # In-memory builds keep every output (and cache) off the disk
+        self.memory = MemoryOutput() if in_memory else None
+        self.manifest.persist = not in_memory
+        self.content_cache.persist = not in_memory
+        self.images = ResponsiveImages(self.cache_dir / "images", persist=not in_memory)
+        self.logos = SponsorLogos(self.cache_dir / "sponsors", persist=not in_memory)
+        self.compressor = Precompressor(self.cache_dir / "compressed", persist=not in_memory)
+        self.program = ProgramExtractor(self.cache_dir / "program", persist=not in_memory)
+        self.dimensions = ImageDimensions(self.cache_dir / "dimensions.json", persist=not in_memory)
+        self.warned_pypdf = False
+
+        # Phase timings for --profile
+        self.profiler = BuildProfiler() if profile else None
+
+        # Per-thread record of what the page currently being rendered uses
+        self.render_state = threading.local()
 
         # Load configuration
         self.config = self.load_config(config_file)
 
-        # Setup Jinja2 environment
+        # Output assets are hardlinks into a store holding each file once
+        store_dir = Path(self.config.get('asset_store', ".build-cache/objects")).expanduser()
+        self.store = AssetStore(self.base_dir / store_dir, asset_mode)
+
+        # Setup Jinja2 environment; compiled templates persist between runs
         self.env = Environment(
             loader=FileSystemLoader(str(self.templates_dir)),
-            autoescape=True
+            autoescape=True,
+            bytecode_cache=SourceHashBytecodeCache(self.cache_dir / "templates", persist=not in_memory)
         )
+        self.env.globals['responsive_image'] = self.responsive_image
+        self.env.globals['sponsor_logos'] = self.sponsor_logos
+        self.env.globals['bundle'] = self.bundle
+        self.env.globals['asset_url'] = self.asset_url
+        self.env.globals['framework_stylesheet'] = self.framework_stylesheet
+        self.env.globals['site_url'] = self.site_url
+        self.bundles = {}
+        self.references = {}
+        # Derived files placed in the output this build; editions share them
+        self.emitted = {}
+        self.emit_lock = threading.Lock()
+        # Output URL -> stylesheet source, for the critical-path optimizer
+        self.css_sources = {}
 
     def load_config(self, config_file):
         """Load site configuration from YAML file"""
         config_path = self.base_dir / config_file
         if config_path.exists():
-            with open(config_path, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
+            return self.content_cache.load(config_path, parse_yaml)
         return {}
 
     def load_content(self, content_file):
@@ -46,99 +141,1225 @@ class StaticSiteGenerator:
         if not content_path.exists():
             return {}
 
-        with open(content_path, 'r', encoding='utf-8') as f:
-            if content_file.endswith('.json'):
-                return json.load(f)
-            elif content_file.endswith(('.yaml', '.yml')):
-                return yaml.safe_load(f)
+        if content_file.endswith('.json'):
+            return self.content_cache.load(content_path, json.loads)
+        elif content_file.endswith(('.yaml', '.yml')):
+            return self.content_cache.load(content_path, parse_yaml)
         return {}
 
+    def program_pdf(self, data, existing=True):
+        """Return the local program PDF a content file links to (only if it exists, by default)"""
+        program = data.get('program') if isinstance(data, dict) else None
+        if not isinstance(program, dict) or not program.get('pdf_link'):
+            return None
+        link = str(program['pdf_link'])
+        if "://" in link:
+            return None
+        path = self.base_dir / link.lstrip("/")
+        if path.suffix.lower() != ".pdf" or (existing and not path.is_file()):
+            return None
+        return path
+
+    def prepare_content(self, data):
+        """Add the schedule extracted from the program PDF to loaded content
+
+        Content that lists ``program.sessions`` itself is left alone. The
+        extracted days go to ``program.schedule`` and every session to
+        ``program.sessions``; loaded content is copied, never modified.
+        """
+        path = self.program_pdf(data)
+        if path is None or data['program'].get('sessions'):
+            return data
+        if not self.program.available:
+            if not self.warned_pypdf:
+                print("⚠️  pypdf not installed; the program is only linked as a PDF")
+                self.warned_pypdf = True
+            return data
+        try:
+            schedule = self.program.extract(path, self.manifest.digest(path))
+        except Exception as e:
+            print(f"⚠️  Could not read the program from {path}: {e}")
+            return data
+        if not schedule['days']:
+            return data
+        program = {
+            **data['program'],
+            'schedule': schedule['days'],
+            'sessions': [session for day in schedule['days'] for session in day['sessions']],
+            'extracted': True,
+        }
+        return {**data, 'program': program}
+
+    def editions(self):
+        """Editions built by this run, from ``editions`` in ``config.yaml``
+
+        Each edition has its own content files, output path and ``site``
+        settings such as its base URL. Without an ``editions`` list the site
+        is a single edition built from ``content_files`` at the output root.
+        """
+        site = self.config.get('site') or {}
+        editions = []
+        for entry in self.config.get('editions') or [{}]:
+            path = (entry.get('path') or "").strip("/")
+            content = entry.get('content') or {}
+            if isinstance(content, str):
+                content = {"symposium": content}
+            overrides = dict(entry.get('site') or {})
+            if entry.get('url'):
+                overrides['url'] = entry['url']
+            editions.append({
+                'name': str(entry.get('name') or path or "default"),
+                'path': f"{path}/" if path else "",
+                'content_files': {**self.content_files, **content},
+                'site': {**site, **overrides},
+            })
+        for key in ('name', 'path'):
+            values = [edition[key] for edition in editions]
+            if len(set(values)) != len(values):
+                raise ValueError(f"Editions must have distinct {key}s: {values}")
+        return editions
+
+    def edition_pages(self):
+        """Yield ``(edition, template, output)`` for every page of every edition"""
+        for edition in self.editions():
+            for template_name, output_name in self.pages:
+                yield edition, template_name, edition['path'] + output_name
+
+    def load_edition_content(self):
+        """Load the content of every edition, parsing each file once"""
+        files = dict.fromkeys(file for edition in self.editions()
+                              for file in edition['content_files'].values())
+        return self.page_context(*((file, self.prepare_content(self.load_content(file))) for file in files))
+
     def ensure_output_dir(self):
         """Create or clean output directory"""
-        if self.output_dir.exists():
+        if self.memory is not None:
+            self.manifest.reset()
+            return
+        if self.output_dir.exists() and not self.incremental:
             shutil.rmtree(self.output_dir)
+        if not self.incremental:
+            self.manifest.reset()
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
+    def asset_groups(self):
+        """Group asset files by their top-level directory under assets/"""
+        groups = {}
+        for src in sorted(self.assets_dir.rglob("*")):
+            if src.is_file():
+                rel = src.relative_to(self.assets_dir)
+                group = rel.parts[0] if len(rel.parts) > 1 else "."
+                groups.setdefault(group, []).append(src)
+        return groups
+
+    def copy_asset_files(self, sources):
+        """Sync individual asset files into the output directory"""
+        for src in sources:
+            output_name = (Path("assets") / src.relative_to(self.assets_dir)).as_posix()
+            output_path = self.output_dir / output_name
+            inputs = {output_name: self.manifest.digest(src)}
+            if self.memory is not None:
+                self.memory.link(output_name, src)
+                self.manifest.record(output_name, None, inputs)
+                continue
+            self.asset_sync.sync_file(self.store.add_file(src, inputs[output_name]), output_path)
+            if self.manifest.is_fresh(output_name, output_path, inputs):
+                self.manifest.keep(output_name)
+            else:
+                self.manifest.record(output_name, output_path, inputs)
+
     def copy_assets(self):
-        """Copy static assets to output directory"""
+        """Sync static assets into the output directory"""
         if self.assets_dir.exists():
-            dest_assets = self.output_dir / "assets"
-            shutil.copytree(self.assets_dir, dest_assets, dirs_exist_ok=True)
-            print(f"Copied assets to {dest_assets}")
-            
-            # List copied image files for debugging
-            images_dir = dest_assets / "images"
-            if images_dir.exists():
-                print("⚠️  No images directory found in assets!")
+            # Stale files are removed through the manifest, which also knows
+            # about outputs that later build stages place under assets/
+            for sources in self.asset_groups().values():
+                self.copy_asset_files(sources)
+            self.report_assets()
         else:
             print("⚠️  Assets directory not found!")
-    def render_page(self, template_name, output_name, context=None):
+
+    def report_assets(self):
+        """Print what the asset sync did"""
+        if self.memory is not None:
+            print(f"Serving assets from {self.assets_dir}")
+            return
+        dest_assets = self.output_dir / "assets"
+        print(f"Synced assets to {dest_assets} ({self.asset_sync.summary() or 'nothing to do'})")
+
+        # List copied image files for debugging
+        images_dir = dest_assets / "images"
+        if not images_dir.exists():
+            print("⚠️  No images directory found in assets!")
+
+    def prune_store(self):
+        """Remove asset store objects that no output or cache file links to"""
+        files, size = self.store.prune()
+        print(f"Pruned {files} objects ({size / 1024:.0f} KiB) from {self.store.directory}")
+
+    def precompile_templates(self):
+        """Compile every template into the bytecode cache ahead of time"""
+        names = self.env.list_templates()
+        for name in names:
+            try:
+                self.env.get_template(name)
+            except TemplateSyntaxError as e:
+                print(f"⚠️  Could not compile {name}: {e}")
+        print(f"Precompiled {len(names)} templates into {self.cache_dir / 'templates'}")
+
+    def template_dependencies(self, template_name):
+        """Return a template and every template it extends, includes or imports"""
+        seen = []
+        pending = [template_name]
+        while pending:
+            name = pending.pop()
+            if name in seen:
+                continue
+            seen.append(name)
+            pending.extend(self.template_references(name))
+        return seen
+
+    def template_references(self, name):
+        """Templates a single template refers to, parsed once per version of its source"""
+        key = (name, self.manifest.digest(self.templates_dir / name))
+        if key not in self.references:
+            source, _, _ = self.env.loader.get_source(self.env, name)
+            # Dynamic references (None) cannot be resolved statically
+            self.references[key] = [ref for ref in meta.find_referenced_templates(self.env.parse(source))
+                                    if ref is not None]
+        return self.references[key]
+
+    def template_inputs(self, template_name):
+        """Map every template a page depends on to its content digest"""
+        return {
+            f"templates/{name}": self.manifest.digest(self.templates_dir / name)
+            for name in self.template_dependencies(template_name)
+        }
+
+    def render_page(self, template_name, output_name, context=None, edition=None):
         """Render a single page using Jinja2 template"""
         if context is None:
             context = {}
 
         # Add global context
         context.update({
-            'site': self.config.get('site', {}),
+            'site': edition['site'] if edition else self.config.get('site', {}),
             'config': self.config
         })
 
+        output_path = self.output_dir / output_name
+        inputs = self.template_inputs(template_name)
+        inputs['context'] = context_digest(context)
+        if self.incremental and self.manifest.is_fresh(output_name, output_path, inputs):
+            self.manifest.keep(output_name)
+            for generated in self.manifest.outputs[output_name].get('generated', ()):
+                self.manifest.keep(generated)
+            print(f"Up to date {output_path}")
+            return
+
+        # Record which content keys the page reads so watch mode can target rebuilds
+        content_keys = set()
+        tracked = {
+            name: TrackingDict(value, content_keys, name) if isinstance(value, dict) else value
+            for name, value in context.items()
+            if name in (edition['content_files'] if edition else self.content_files)
+        }
+
+        with self.profile(f"template:{template_name}"):
+            template = self.env.get_template(template_name)
+        self.render_state.discovered = {}
+        self.render_state.generated = []
+        self.render_state.root = "../" * output_name.count("/")
+        try:
+            with self.profile(f"render:{output_name}"):
+                rendered = "".join(template.generate(**{**context, **tracked}))
+        finally:
+            discovered = self.render_state.discovered
+            generated = self.render_state.generated
+            self.render_state.discovered = self.render_state.generated = self.render_state.root = None
+
+        # Markup the passes add is minified with the rest of the page
+        with self.profile(f"critical-css:{output_name}"):
+            rendered = self.optimize_critical_path(rendered, output_name)
+        with self.profile(f"image-hints:{output_name}"):
+            rendered = self.add_image_hints(rendered, output_name, discovered)
+        if self.minify_html(output_name):
+            with self.profile(f"minify:{output_name}"):
+                rendered = "".join(HtmlMinifier().minify_stream([rendered]))
+
+        recorded_path = output_path if self.memory is None else None
+        shown_path = recorded_path or f"memory:/{output_name}"
+        if self.write_output(output_name, rendered.encode('utf-8')):
+            print(f"Generated {shown_path}")
+        else:
+            print(f"Unchanged {shown_path}")
+        self.manifest.record(output_name, recorded_path, inputs, content_keys,
+                             discovered=discovered, generated=generated)
+
+    def render_stream(self, template_name, output_name, context, edition=None):
+        """Render a page chunk by chunk straight to disk
+
+        Used for collection pages, which can number in the tens of thousands:
+        the page is never held in memory as a whole (except for in-memory
+        builds), and ``context`` should only hold what the page shows so the
+        freshness check stays cheap. Returns True if the output changed.
+        """
+        site = edition['site'] if edition else self.config.get('site', {})
+        output_path = self.output_dir / output_name
+        inputs = self.template_inputs(template_name)
+        inputs['context'] = context_digest({**context, 'site': site, 'config': self.config})
+        if self.incremental and self.manifest.is_fresh(output_name, output_path, inputs):
+            self.manifest.keep(output_name)
+            for generated in self.manifest.outputs[output_name].get('generated', ()):
+                self.manifest.keep(generated)
+            return False
+
         template = self.env.get_template(template_name)
-        rendered = template.render(**context)
+        self.render_state.discovered = {}
+        self.render_state.generated = []
+        self.render_state.root = "../" * output_name.count("/")
+        # Templates link within their edition; shared assets resolve from the site root
+        depth = output_name.count("/") - (edition['path'].count("/") if edition else 0)
+        try:
+            chunks = template.generate(site=site, config=self.config, root="../" * depth, **context)
+            if self.minify_html(output_name):
+                chunks = HtmlMinifier().minify_stream(chunks)
+            if self.memory is None:
+                changed = stream_if_changed(output_path, chunks)
+            else:
+                changed = self.write_output(output_name, "".join(chunks).encode('utf-8'))
+        finally:
+            discovered = self.render_state.discovered
+            generated = self.render_state.generated
+            self.render_state.discovered = self.render_state.generated = self.render_state.root = None
+
+        self.manifest.record(output_name, output_path if self.memory is None else None, inputs,
+                             discovered=discovered, generated=generated)
+        return changed
+
+    def participant_directory(self, edition):
+        """An edition's institutions, each with its slug, URL and people
+
+        Slugs are accent-folded and made unique in list order; URLs are
+        relative to the edition's root.
+        """
+        symposium = self.edition_data.get(edition['name'], {}).get('symposium') or {}
+        participants = symposium.get('participants') or []
+        institutions = [
+            {'name': group.get('institution') or "", 'slug': slug, 'url': f"participants/{slug}/"}
+            for group, slug in zip(participants, unique_slugs(g.get('institution') or "" for g in participants))
+        ]
+        members = [[name for name in group.get('people') or [] if name] for group in participants]
+        person_slugs = iter(unique_slugs(name for names in members for name in names))
+        for institution, names in zip(institutions, members):
+            institution['people'] = [
+                {'name': name, 'slug': slug, 'url': f"people/{slug}/"}
+                for name, slug in zip(names, person_slugs)
+            ]
+        return institutions
+
+    def participant_collection(self, edition):
+        """Yield ``(template, output, context)`` for an edition's institution and person pages
+
+        Every institution in ``symposium.participants`` gets a page under
+        ``participants/<slug>/`` and every person one under
+        ``people/<slug>/``, plus an index page for each collection, all
+        below the edition's path.
+        """
+        symposium = self.edition_data.get(edition['name'], {}).get('symposium') or {}
+        prefix = edition['path']
+        info = symposium.get('site') or {}
+        institutions = self.participant_directory(edition)
+        summaries = [
+            {'name': inst['name'], 'slug': inst['slug'], 'url': inst['url'], 'count': len(inst['people'])}
+            for inst in institutions
+        ]
+        people = sorted(
+            (dict(person, institution=summary)
+             for inst, summary in zip(institutions, summaries) for person in inst['people']),
+            key=lambda person: (slugify(person['name']), person['slug']),
+        )
+
+        yield "institutions.html", f"{prefix}participants/index.html", {'edition': info, 'institutions': summaries}
+        yield "people.html", f"{prefix}people/index.html", {'edition': info, 'people': people}
+        for institution in institutions:
+            yield "institution.html", f"{prefix}{institution['url']}index.html", {
+                'edition': info, 'institution': institution}
+        by_slug = {inst['slug']: inst['people'] for inst in institutions}
+        for person in people:
+            colleagues = by_slug[person['institution']['slug']]
+            yield "person.html", f"{prefix}{person['url']}index.html", {
+                'edition': info, 'person': person,
+                'colleagues': [other for other in colleagues if other['slug'] != person['slug']],
+            }
+
+    def render_collections(self):
+        """Render every collection page, streaming each one to disk"""
+        if not all((self.templates_dir / name).exists() for name in self.collection_templates):
+            return
+        total = changed = 0
+        rendered = set()
+        for edition in self.editions():
+            for template_name, output_name, context in self.participant_collection(edition):
+                total += 1
+                changed += self.render_stream(template_name, output_name, context, edition)
+                rendered.add(output_name)
+        # Pages of renamed or removed people go stale, even in watch mode
+        templates = {f"templates/{name}" for name in self.collection_templates}
+        self.manifest.produced -= {name for name, record in list(self.manifest.outputs.items())
+                                   if name not in rendered and templates & record['inputs'].keys()}
+        print(f"Generated {changed} of {total} participant pages ({total - changed} unchanged)")
+
+    def search_index(self, edition):
+        """Collect an edition's institutions, people and program sessions into a search index"""
+        symposium = self.edition_data.get(edition['name'], {}).get('symposium') or {}
+        pages = all((self.templates_dir / name).exists() for name in self.collection_templates)
+        index = SearchIndex()
+        for institution in self.participant_directory(edition):
+            people = institution['people']
+            index.add("institution", institution['name'],
+                      institution['url'] if pages else "index.html#participants",
+                      f"{len(people)} participant{'s' if len(people) != 1 else ''}")
+            for person in people:
+                index.add("person", person['name'], person['url'] if pages else "index.html#participants",
+                          institution['name'])
+        for session in (symposium.get('program') or {}).get('sessions') or []:
+            speakers = session.get('speakers') or []
+            anchor = session.get('id') or "program"
+            index.add("session", session.get('title') or "", f"index.html#{anchor}",
+                      ", ".join(filter(None, [session.get('time'), *speakers])), extra=speakers)
+        return index
+
+    def build_search_index(self):
+        """Write the search index of every edition to ``<edition>/search/``"""
+        options = self.config.get('search') or {}
+        if not options.get('enabled', True):
+            return
+        documents = 0
+        for edition in self.editions():
+            index = self.search_index(edition)
+            directory = f"{edition['path']}search/"
+            written = set()
+            for name, data in index.files().items():
+                written.add(directory + name)
+                self.emit_file(directory + name, data, {"search": hashlib.sha256(data).hexdigest()})
+            # Shards of an earlier index go stale, even in watch mode
+            self.manifest.produced -= {name for name in list(self.manifest.outputs)
+                                       if name.startswith(directory) and name.endswith(".json")
+                                       and name not in written}
+            documents += len(index.docs)
+        print(f"Indexed {documents} search documents")
+
+    def minify_html(self, output_name):
+        """Whether a page is minified, per ``minify_html`` in ``config.yaml``"""
+        options = self.config.get('minify_html') or {}
+        if not options.get('enabled', True):
+            return False
+        return not any(fnmatchcase(output_name, pattern) for pattern in options.get('skip', []))
 
+    def optimize_critical_path(self, html, output_name):
+        """Inline the CSS the first screen needs, defer the rest and add resource hints
+
+        Everything up to the end of the first ``fold_sections`` sections is
+        treated as above the fold. Rules from local stylesheets that match it
+        are inlined, and the stylesheets themselves load without blocking
+        rendering. Stylesheets from CDNs stay blocking, but their origins get
+        ``preconnect`` hints, and the first image above the fold is preloaded.
+        """
+        options = self.config.get('critical_css') or {}
+        if not options.get('enabled', True):
+            return html
+        outline = PageOutline(options.get('fold_sections', 1))
+        outline.feed(html)
+        outline.close()
+        if outline.head_insert is None:
+            return html
+
+        usage = SelectorUsage()
+        usage.feed(html[:outline.fold_end] if outline.fold_end else html)
+        base = posixpath.dirname(output_name)
+        edits = []
+        for start, end, attrs in outline.stylesheets:
+            href = attrs.get('href') or ''
+            source = self.css_sources.get(posixpath.normpath(posixpath.join(base, href)))
+            if source is None:
+                continue
+            css = source.read_text(encoding='utf-8') if isinstance(source, Path) else source.decode('utf-8')
+            critical = minify_css(purge_css(css, usage))
+            preload = html_attributes({'rel': 'preload', 'href': href, 'as': 'style',
+                                       'onload': "this.onload=null;this.rel='stylesheet'"})
+            edits.append((start, end, f"<style>{critical}</style>"
+                                      f"<link {preload}><noscript>{html[start:end]}</noscript>"))
+
+        hints = [f"<link {html_attributes({'rel': 'preconnect', 'href': origin, 'crossorigin': cors})}>"
+                 for origin, cors in outline.origins.items()]
+        if outline.hero is not None:
+            img = outline.hero['img']
+            preload = {'rel': 'preload', 'as': 'image', 'href': img.get('src')}
+            source = next((src for src in outline.hero['sources'] if src.get('srcset')), None)
+            if source is not None:
+                preload.update(href=None, imagesrcset=source['srcset'],
+                               imagesizes=source.get('sizes'), type=source.get('type'))
+            elif img.get('srcset'):
+                preload.update(imagesrcset=img['srcset'], imagesizes=img.get('sizes'))
+            if preload['href'] or preload.get('imagesrcset'):
+                hints.append(f"<link {html_attributes(preload)}>")
+        if hints:
+            pos = outline.head_insert
+            # Match the page's layout: one hint per line unless it was minified
+            indent = html[html.rfind("\n", 0, pos) + 1:pos]
+            separator = "" if indent.strip() else "\n" + indent
+            edits.append((pos, pos, separator.join(hints) + separator))
+
+        for start, end, replacement in sorted(edits, reverse=True):
+            html = html[:start] + replacement + html[end:]
+        return html
+
+    def add_image_hints(self, html, output_name, discovered):
+        """Give every ``<img>`` its intrinsic size and a loading priority
+
+        Local images without ``width``/``height`` get the size read from the
+        file's header, so the browser can reserve their space before they
+        load. Images below the fold (as for ``critical_css``) load lazily and
+        decode off the main thread; the first image above it, the hero, is
+        fetched with high priority. Attributes already in the markup win.
+        Probed files are added to ``discovered``.
+        """
+        options = self.config.get('image_hints') or {}
+        if not options.get('enabled', True):
+            return html
+        outline = PageOutline((self.config.get('critical_css') or {}).get('fold_sections', 1))
+        outline.feed(html)
+        outline.close()
+        hero = outline.hero['start'] if outline.hero else None
+        base = posixpath.dirname(output_name)
+        edits = []
+        for image in outline.images:
+            attrs = image['attrs']
+            src = attrs.get('src') or ''
+            added = {}
+            if 'width' not in attrs and 'height' not in attrs and src and "://" not in src \
+                    and not src.startswith(('/', '//', 'data:')):
+                # Output names under the site root mirror the source tree
+                name = posixpath.normpath(posixpath.join(base, urllib.parse.unquote(src.split('?')[0])))
+                path = self.base_dir / name
+                if not name.startswith("../") and path.is_file():
+                    digest = self.manifest.digest(path)
+                    discovered[str(path)] = digest
+                    size = self.dimensions.size(path, digest)
+                    if size:
+                        added['width'], added['height'] = size
+            if image['start'] == hero:
+                added['fetchpriority'] = 'high'
+            elif not image['above_fold'] and not src.startswith('data:'):
+                added.update(loading='lazy', decoding='async')
+            added = {name: value for name, value in added.items() if name not in attrs}
+            if added:
+                tag = html[image['start']:image['end']]
+                cut = len(tag) - (2 if tag.endswith('/>') else 1)
+                edits.append((image['start'] + cut, f" {html_attributes(added)}"))
+        for pos, text in sorted(edits, reverse=True):
+            html = html[:pos] + text + html[pos:]
+        return html
+
+    def profile(self, name):
+        """Context manager timing a phase when profiling, a no-op otherwise"""
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.phase(name)
+
+    def emit_file(self, output_name, source, inputs):
+        """Place a derived file (a cached path or bytes) in the output and record it"""
         output_path = self.output_dir / output_name
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        if getattr(self.render_state, 'generated', None) is not None:
+            self.render_state.generated.append(output_name)
+        # Pages of every edition use the same images and bundles; place each once
+        with self.emit_lock:
+            if self.emitted.get(output_name) == inputs:
+                return
+            self.emitted[output_name] = inputs
+        if self.incremental and self.manifest.is_fresh(output_name, output_path, inputs):
+            self.manifest.keep(output_name)
+            return
+        if self.memory is not None:
+            if isinstance(source, Path):
+                self.memory.link(output_name, source)
+            else:
+                self.memory.write(output_name, source)
+            self.manifest.record(output_name, None, inputs)
+            return
+        if isinstance(source, Path):
+            # Build-cache files are never edited in place, so the store may share their inode
+            source = self.store.add_file(source, self.manifest.digest(source),
+                                         link=self.cache_dir in source.parents)
+        else:
+            source = self.store.add_bytes(source)
+        self.asset_sync.sync_file(source, output_path)
+        self.manifest.record(output_name, output_path, inputs)
+
+    def site_url(self, path):
+        """Make a site-root-relative URL relative to the page being rendered"""
+        root = getattr(self.render_state, 'root', None)
+        if not root or not path or path.startswith(('/', '#', 'data:', 'http:', 'https:', 'mailto:')):
+            return path
+        return root + path
+
+    def note_discovered(self, path, digest):
+        """Record a source file used by the page currently being rendered"""
+        if getattr(self.render_state, 'discovered', None) is not None:
+            self.render_state.discovered[str(path)] = digest
+
+    def image_variants(self, path):
+        """Generate (or reuse) responsive variants of a site image and place them in the output"""
+        src = self.base_dir / path
+        if not self.images.available or src.suffix.lower() not in self.images.suffixes or not src.is_file():
+            return []
+        digest = self.manifest.digest(src)
+        self.note_discovered(src, digest)
+        variants = []
+        for variant in self.images.variants(src, digest):
+            output_name = f"assets/responsive/{src.stem}.{digest[:10]}.{variant['width']}w.{variant['ext']}"
+            self.emit_file(output_name, variant['source'], {path: digest})
+            variants.append(dict(variant, url=output_name))
+        return variants
+
+    def responsive_image(self, path, sizes="100vw", alt="", **attrs):
+        """Template helper emitting a <picture> with srcset/sizes for every variant"""
+        img_attrs = {'src': self.site_url(path), 'alt': alt, **attrs}
+        variants = self.image_variants(path)
+        if not variants:
+            return Markup(f"<img {html_attributes(img_attrs)}>")
+
+        by_mime = {}
+        for variant in variants:
+            by_mime.setdefault(variant['mime'], []).append(f"{self.site_url(variant['url'])} {variant['width']}w")
+        fallback_mimes = {mime for _, mime, _ in self.images.fallbacks.values()}
+        sources = "".join(
+            f'<source {html_attributes({"type": mime, "srcset": ", ".join(srcset), "sizes": sizes})}>'
+            for mime, srcset in by_mime.items() if mime not in fallback_mimes
+        )
+        for mime in fallback_mimes & by_mime.keys():
+            img_attrs.update(srcset=", ".join(by_mime[mime]), sizes=sizes)
+        return Markup(f"<picture>{sources}<img {html_attributes(img_attrs)}></picture>")
+
+    def build_bundle(self, paths):
+        """Concatenate and minify assets into one file named after its content hash
+
+        The bundle is written next to the first source, so relative
+        references keep working; stylesheets from other directories have
+        their ``url()`` references rebased. Returns the bundle's URL.
+        """
+        sources = [self.base_dir / path for path in paths]
+        digests = [self.manifest.digest(src) for src in sources]
+        for src, digest in zip(sources, digests):
+            self.note_discovered(src, digest)
 
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(rendered)
+        key = tuple(zip(paths, digests))
+        if key not in self.bundles:
+            ext = sources[0].suffix.lower()
+            bundle_dir = posixpath.dirname(paths[0])
+            minify = self.minifiers.get(ext)
+            if minify is None and len(sources) == 1:
+                data = sources[0]
+                fingerprint = digests[0][:10]
+            else:
+                parts = []
+                for path, src in zip(paths, sources):
+                    text = src.read_text(encoding='utf-8')
+                    if ext == ".css":
+                        text = rebase_css_urls(text, posixpath.dirname(path), bundle_dir)
+                    parts.append(minify(text) if minify else text)
+                # A newline plus semicolon keeps concatenated scripts separate statements
+                data = (";\n" if ext == ".js" else "\n").join(parts).encode('utf-8')
+                fingerprint = hashlib.sha256(data).hexdigest()[:10]
+            stem = sources[0].stem if len(sources) == 1 else f"{sources[0].stem}-bundle"
+            output_name = posixpath.join(bundle_dir, f"{stem}.{fingerprint}{ext}")
+            self.bundles[key] = (output_name, data, fingerprint)
+            if ext == ".css":
+                self.css_sources[output_name] = data
 
-        print(f"Generated {output_path}")
+        output_name, data, fingerprint = self.bundles[key]
+        self.emit_file(output_name, data, {"bundle": fingerprint})
+        return output_name
+
+    def bundle(self, kind, *paths):
+        """Template helper emitting a <link> or <script> for a minified, fingerprinted bundle"""
+        url = self.site_url(self.build_bundle(paths))
+        if kind == "css":
+            return Markup(f"<link {html_attributes({'href': url, 'rel': 'stylesheet'})}>")
+        return Markup(f"<script {html_attributes({'src': url})}></script>")
+
+    def asset_url(self, path):
+        """Template helper returning the fingerprinted URL of a single asset"""
+        return self.site_url(self.build_bundle([path]))
+
+    def purge_options(self):
+        """Return the ``purge_css`` settings, or None when purging is switched off"""
+        options = self.config.get('purge_css') or {}
+        return options if options.get('enabled', True) else None
+
+    @staticmethod
+    def purged_name(vendored):
+        """Output name of the purged copy, next to the vendored stylesheet so relative URLs resolve"""
+        directory, filename = posixpath.split(vendored)
+        return posixpath.join(directory, f"{filename.split('.')[0]}.purged.css")
+
+    def framework_stylesheet(self, name):
+        """Template helper linking a framework stylesheet from ``config.yaml``
+
+        When purging is enabled and a vendored copy exists, the link points
+        at the purged stylesheet; otherwise at the CDN.
+        """
+        sheet = (self.config.get('stylesheets') or {}).get(name)
+        if sheet is None:
+            raise ValueError(f"Unknown stylesheet: {name}")
+        vendored = sheet.get('vendored')
+        if vendored and self.purge_options() is not None:
+            src = self.base_dir / vendored
+            try:
+                digest = self.manifest.digest(src)
+            except OSError:
+                digest = None
+            # Recorded even when missing, so vendoring the file triggers a rebuild
+            self.note_discovered(src, digest)
+            if digest is not None:
+                # Critical CSS is taken from the full copy; purging runs after rendering
+                self.css_sources[self.purged_name(vendored)] = src
+                href = self.site_url(self.purged_name(vendored))
+                return Markup(f"<link {html_attributes({'href': href, 'rel': 'stylesheet'})}>")
+        attrs = {'href': sheet['href'], 'rel': 'stylesheet',
+                 'integrity': sheet.get('integrity'), 'crossorigin': sheet.get('crossorigin')}
+        return Markup(f"<link {html_attributes(attrs)}>")
+
+    def output_bytes(self, output_name):
+        """Read back a file produced by the current build"""
+        if self.memory is not None:
+            return self.memory.read(output_name)
+        return (self.output_dir / output_name).read_bytes()
+
+    def purge_stylesheets(self):
+        """Write purged copies of the vendored framework stylesheets
+
+        Every rendered page and the configured scripts are scanned for the
+        selectors they use; the purged file is only rebuilt when one of
+        them, the vendored stylesheet or the safelist changed.
+        """
+        options = self.purge_options()
+        if options is None:
+            return
+        targets = [sheet['vendored'] for sheet in (self.config.get('stylesheets') or {}).values()
+                   if sheet.get('vendored') and (self.base_dir / sheet['vendored']).is_file()]
+        if not targets:
+            return
+
+        pages = sorted(name for name in self.manifest.produced
+                       if name.endswith('.html') and name in self.manifest.outputs)
+        scripts = [path for path in options.get('content', []) if (self.base_dir / path).is_file()]
+        safelist = [str(pattern) for pattern in options.get('safelist', [])]
+        scanned = {}
+        for page in pages:
+            if self.memory is not None:
+                scanned[f"output/{page}"] = hashlib.sha256(self.output_bytes(page)).hexdigest()
+            else:
+                scanned[f"output/{page}"] = self.manifest.digest(self.output_dir / page)
+        for path in scripts:
+            scanned[path] = self.manifest.digest(self.base_dir / path)
+        scanned['safelist'] = context_digest(safelist)
+
+        usage = None
+        for vendored in targets:
+            output_name = self.purged_name(vendored)
+            inputs = {vendored: self.manifest.digest(self.base_dir / vendored), **scanned}
+            if self.incremental and self.manifest.is_fresh(output_name, self.output_dir / output_name, inputs):
+                self.manifest.keep(output_name)
+                continue
+            if usage is None:
+                usage = SelectorUsage()
+                for page in pages:
+                    usage.feed(self.output_bytes(page).decode('utf-8'))
+                for path in scripts:
+                    usage.add_script((self.base_dir / path).read_text(encoding='utf-8'))
+            css = (self.base_dir / vendored).read_text(encoding='utf-8')
+            purged = purge_css(css, usage, safelist)
+            self.emit_file(output_name, purged.encode('utf-8'), inputs)
+            print(f"Purged {vendored}: {len(css) / 1024:.0f} KB -> {len(purged) / 1024:.0f} KB")
+
+    def output_digest(self, output_name):
+        """Digest of a file produced by the current build"""
+        if self.memory is not None:
+            return hashlib.sha256(self.output_bytes(output_name)).hexdigest()
+        return self.manifest.digest(self.output_dir / output_name)
+
+    def precompress_outputs(self):
+        """Write .gz (and .br) side files next to every compressible output
+
+        Side files that would not be smaller are skipped, and compressed
+        results are reused from the cache while the output's digest is
+        unchanged.
+        """
+        produced = set(self.manifest.produced)
+        suffixes = tuple(suffix for _, suffix in self.compressor.encodings)
+        for name in produced:
+            # Drop side files of outputs this build removed
+            if name.endswith((".gz", ".br")) and name[:-3] not in produced:
+                self.manifest.produced.discard(name)
+        names = sorted(name for name in produced
+                       if name.endswith(self.compressor.suffixes) and name in self.manifest.outputs)
+
+        def side_files(name):
+            digest = self.output_digest(name)
+            written = 0
+            for encoding, suffix in self.compressor.encodings:
+                side_name = name + suffix
+                inputs = {name: digest, "encoding": encoding}
+                if self.incremental and self.manifest.is_fresh(side_name, self.output_dir / side_name, inputs):
+                    self.manifest.keep(side_name)
+                    written += 1
+                    continue
+                result = self.compressor.compress(lambda: self.output_bytes(name), digest, encoding, suffix)
+                if result is not None:
+                    self.emit_file(side_name, result, inputs)
+                    written += 1
+            return written
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            counts = list(pool.map(side_files, names))
+        print(f"Precompressed {len(names)} outputs into {sum(counts)} "
+              f"{'/'.join(suffixes)} files")
+
+    def sponsor_logo_sources(self, sponsors):
+        """Return ``(path, digest)`` for every sponsor logo that exists"""
+        sources = []
+        for sponsor in sponsors:
+            src = self.base_dir / sponsor.get('logo', '')
+            if sponsor.get('logo') and src.is_file():
+                sources.append((src, self.manifest.digest(src)))
+        return sources
+
+    def sponsor_logos(self, sponsors, class_="img-fluid sponsor-logo"):
+        """Template helper yielding ``(sponsor, logo markup)`` pairs
+
+        Logos are normalised and either inlined as data URIs or drawn from a
+        single sprite sheet, so the whole list costs at most one request.
+        Without Pillow, the original logo files are used.
+        """
+        sponsors = list(sponsors or [])
+        usable = [sp for sp in sponsors if sp.get('logo') and (self.base_dir / sp['logo']).is_file()]
+        if not self.images.available:
+            usable = []
+
+        sources = self.sponsor_logo_sources(usable)
+        for src, digest in sources:
+            self.note_discovered(src, digest)
+        packed = self.logos.pack(sources) if sources else {'sheet': None, 'items': []}
+        sheet_url = None
+        if packed['sheet'] is not None:
+            sheet_key = self.logos.cache_key(sources)
+            sheet_url = f"assets/sponsors.{sheet_key[:10]}.{packed['ext']}"
+            self.emit_file(sheet_url, packed['sheet'], {"sponsors": sheet_key})
+
+        placements = {id(sp): item for sp, item in zip(usable, packed['items'])}
+        result = []
+        for sp in sponsors:
+            alt = f"{sp.get('name')} logo"
+            item = placements.get(id(sp))
+            if item is None:
+                markup = f"<img {html_attributes({'src': self.site_url(sp.get('logo')), 'class': class_, 'alt': alt})}>"
+            elif 'inline' in item:
+                markup = f"<img {html_attributes({'src': item['inline'], 'class': class_, 'alt': alt, 'width': item['width'], 'height': item['height']})}>"
+            else:
+                sheet_w, sheet_h = packed['size']
+                w, h = item['sprite_width'], item['sprite_height']
+                pos_x = item['x'] / (sheet_w - w) * 100 if sheet_w > w else 0
+                pos_y = item['y'] / (sheet_h - h) * 100 if sheet_h > h else 0
+                style = (
+                    f"display:inline-block;width:100%;max-width:{item['width']}px;"
+                    f"aspect-ratio:{w}/{h};background-image:url({self.site_url(sheet_url)});"
+                    f"background-size:{sheet_w / w * 100:.4f}% auto;"
+                    f"background-position:{pos_x:.4f}% {pos_y:.4f}%;background-repeat:no-repeat"
+                )
+                markup = f"<span {html_attributes({'class': class_, 'role': 'img', 'aria-label': alt, 'style': style})}></span>"
+            result.append((sp, Markup(markup)))
+        return result
+
+    def referenced_images(self):
+        """Find raster images referenced from the content files and templates
+
+        Sponsor logos are left out; they are packed by ``sponsor_logos``.
+        """
+        found = set()
+
+        def walk(value):
+            if isinstance(value, dict):
+                for item in value.values():
+                    walk(item)
+            elif isinstance(value, list):
+                for item in value:
+                    walk(item)
+            elif isinstance(value, str) and value.lower().endswith(self.images.suffixes):
+                found.add(value)
+
+        walk(self.edition_data)
+        for content in self.edition_contents():
+            found.difference_update(sp.get('logo') for sp in content.get('sponsors') or ())
+        for template in self.templates_dir.rglob("*.html"):
+            text = template.read_text(encoding='utf-8')
+            found.update(re.findall(r'src="([^"{}]+\.(?:jpe?g|png))"', text, flags=re.IGNORECASE))
+        return sorted(path for path in found if (self.base_dir / path).is_file())
+
+    def edition_contents(self):
+        """Distinct content mappings across editions; a file shared by editions counts once"""
+        contents = {}
+        for data in self.edition_data.values():
+            for content in data.values():
+                if isinstance(content, dict):
+                    contents.setdefault(id(content), content)
+        return list(contents.values())
+
+    def build_images(self):
+        """Encode responsive variants for every referenced image, in parallel
+
+        This only warms the variant cache; files reach the output when a
+        template actually uses them through ``responsive_image``.
+        """
+        if not self.images.available:
+            print("⚠️  Pillow is not installed; skipping responsive images")
+            return
+        paths = self.referenced_images()
+
+        def prepare(path):
+            src = self.base_dir / path
+            return len(self.images.variants(src, self.manifest.digest(src)))
+
+        def pack_logos(content):
+            sources = self.sponsor_logo_sources(content.get('sponsors') or ())
+            return len(self.logos.pack(sources)['items']) if sources else 0
+
+        with ThreadPoolExecutor(max_workers=self.jobs or os.cpu_count() or 1) as pool:
+            logo_counts = pool.map(pack_logos, [content for content in self.edition_contents()
+                                                if content.get('sponsors')])
+            counts = list(pool.map(prepare, paths))
+            logo_counts = list(logo_counts)
+        print(f"Prepared {sum(counts)} responsive variants for {len(paths)} images")
+        if logo_counts:
+            print(f"Packed {sum(logo_counts)} sponsor logos")
+
+    def write_output(self, output_name, data):
+        """Store a generated file on disk, or in memory for in-memory builds
+
+        Returns True when the stored bytes changed.
+        """
+        if self.memory is not None:
+            self.memory.write(output_name, data)
+            return True
+        return write_if_changed(self.output_dir / output_name, data)
+
+    def remove_stale_outputs(self):
+        """Delete outputs produced by a previous build that this build no longer emits"""
+        for output_name in self.manifest.stale_outputs():
+            output_path = self.output_dir / output_name
+            if self.memory is not None:
+                self.memory.remove(output_name)
+            elif output_path.is_file():
+                output_path.unlink()
+                print(f"Removed stale {output_path}")
+                # Prune directories left empty by the removal
+                parent = output_path.parent
+                while parent != self.output_dir and not any(parent.iterdir()):
+                    parent.rmdir()
+                    parent = parent.parent
+            self.manifest.forget(output_name)
+
+    def page_context(self, *content_items):
+        """Combine loaded ``(file, data)`` pairs into the context of each edition's pages"""
+        loaded = dict(content_items)
+        self.edition_data = {
+            edition['name']: {name: loaded[file] for name, file in edition['content_files'].items()}
+            for edition in self.editions()
+        }
+        return self.edition_data
+
+    def build_graph(self):
+        """Describe the build as a graph of tasks that can run in parallel"""
+        graph = TaskGraph(self.jobs, profiler=self.profiler)
+
+        # Ensure clean output directory (kept as-is for incremental builds)
+        graph.add("output", self.ensure_output_dir)
+
+        # Load content data, one task per content file however many editions use it
+        content_tasks = []
+        content_files = dict.fromkeys(file for edition in self.editions()
+                                      for file in edition['content_files'].values())
+        for content_file in content_files:
+            content_tasks.append(graph.add(
+                f"content:{content_file}",
+                lambda f=content_file: (f, self.prepare_content(self.load_content(f))),
+            ))
+        graph.add("context", self.page_context, deps=content_tasks)
+        graph.add("images", lambda *_: self.build_images(), deps=["context", "output"])
+
+        # Copy static assets, one task per asset group
+        asset_tasks = []
+        if self.assets_dir.exists():
+            for group, sources in self.asset_groups().items():
+                asset_tasks.append(graph.add(
+                    f"assets:{group}",
+                    lambda *_, sources=sources: self.copy_asset_files(sources),
+                    deps=["output"],
+                ))
+            graph.add("assets", lambda *_: self.report_assets(), deps=asset_tasks)
+        else:
+            print("⚠️  Assets directory not found!")
+
+        # Render pages
+        page_tasks = []
+        for edition, template_name, output_name in self.edition_pages():
+            page_tasks.append(graph.add(
+                f"page:{output_name}",
+                lambda editions, *_, e=edition, t=template_name, o=output_name: self.render_page(
+                    template_name=t,
+                    output_name=o,
+                    context=dict(editions[e['name']]),
+                    edition=e,
+                ),
+                deps=["context", "output", "images"],
+            ))
+
+        # Per-institution and per-person pages, streamed to disk
+        page_tasks.append(graph.add(
+            "collections",
+            lambda *_: self.render_collections(),
+            deps=["context", "output", "images"],
+        ))
+
+        # Client-side search index, built straight from the content
+        graph.add("search", lambda *_: self.build_search_index(), deps=["context", "output"])
+
+        # Purged stylesheets need every rendered page
+        graph.add("purge-css", lambda *_: self.purge_stylesheets(), deps=page_tasks)
+
+        # Post-process outputs once every producer has finished
+        producers = ["output", "images", "search", "purge-css"] + asset_tasks + page_tasks
+        graph.add("compress", lambda *_: self.precompress_outputs(), deps=producers)
+        graph.add("stale", lambda *_: self.remove_stale_outputs(), deps=["compress"])
+        return graph
 
     def build(self):
         """Build the complete site"""
         print("Building European Mobility Symposium website...")
+        started = time.perf_counter()
+        self.manifest.produced = set()
+        self.emitted = {}
+        if self.memory is not None:
+            self.memory.begin(clean=True)
+        editions = self.editions()
+        if len(editions) > 1:
+            print("Editions: " + ", ".join(f"{e['name']} (/{e['path']})" for e in editions))
 
-        # Ensure clean output directory
-        self.ensure_output_dir()
-
-        # Copy static assets
-        self.copy_assets()
+        with self.profile("build"):
+            graph = self.build_graph()
+            graph.run()
+        with self.profile("manifest:save"):
+            self.manifest.save()
+            self.dimensions.save()
+        if self.memory is None:
+            print(f"Asset store {self.store.directory}: {self.store.summary()}")
 
-        # Load content data
-        symposium_data = self.load_content("symposium.yaml")
-
-        # Render main page
-        self.render_page(
-            template_name="index.html",
-            output_name="index.html",
-            context={"symposium": symposium_data}
-        )
-        '''
-        data = self.load_content("symposium.yaml")
-
-        self.render_page(
-            template_name="index.html",
-            context={
-                **data,               # exposes hero_image & sponsors automatically
-                "map_query": self.get_map_query(data),
-            },
-            output_path="output/index.html",
-        )
-        '''
-        print("✅ Site built successfully!")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"✅ Site built successfully in {elapsed_ms:.0f} ms!")
+        if self.profiler is not None:
+            self.profiler.summary()
+            trace_path = self.profiler.write_trace(self.base_dir / self.profile_trace)
+            print(f"🧭 Wrote Chrome trace to {trace_path}")
+        if self.memory is not None:
+            self.memory.commit()
+            print(f"🧠 Built {len(self.memory.files)} files in memory")
+            return
         print(f"📁 Output directory: {self.output_dir}")
         print(f"🌐 Open {self.output_dir / 'index.html'} in your browser")
 
-    def serve(self, port=8000):
-        """Serve the site locally for development"""
-        import http.server
-        import socketserver
+    def source_snapshot(self):
+        """Return the size/mtime of every file that can affect the build"""
+        snapshot = {}
+        for root in (self.templates_dir, self.content_dir, self.assets_dir):
+            for path in root.rglob("*") if root.exists() else ():
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                if not path.is_dir():
+                    snapshot[path] = (st.st_size, st.st_mtime_ns)
+        if self.config_path.exists():
+            st = self.config_path.stat()
+            snapshot[self.config_path] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def affected_pages(self, changed_templates=(), changed_content_keys=None, changed_sources=()):
+        """Return pages whose recorded templates, content keys or discovered sources changed
+
+        ``changed_content_keys`` maps edition names to the content keys that
+        changed in that edition. Pages are ``(edition, template, output)``.
+        """
+        changed_content_keys = changed_content_keys or {}
+        affected = []
+        for edition, template_name, output_name in self.edition_pages():
+            record = self.manifest.outputs.get(output_name)
+            if record is None:
+                affected.append((edition, template_name, output_name))
+                continue
+            templates = {name[len("templates/"):] for name in record['inputs']
+                         if name.startswith("templates/")}
+            keys = set(record.get('content_keys', ()))
+            changed_keys_here = set(changed_content_keys.get(edition['name'], ()))
+            wildcard_keys = {f"{key.split('.', 1)[0]}.*" for key in changed_keys_here}
+            discovered = set(record.get('discovered', ()))
+            if (templates & set(changed_templates)
+                    or keys & (changed_keys_here | wildcard_keys)
+                    or discovered & {str(path) for path in changed_sources}):
+                affected.append((edition, template_name, output_name))
+        return affected
+
+    def reload_program(self, path, changed_content_keys):
+        """Re-extract the schedule of every content file whose program PDF changed"""
+        loaded = {}
+        for edition in self.editions():
+            data = self.edition_data.setdefault(edition['name'], {})
+            for name, file in edition['content_files'].items():
+                if self.program_pdf(self.load_content(file), existing=False) != path:
+                    continue
+                if file not in loaded:
+                    loaded[file] = self.prepare_content(self.load_content(file))
+                old, data[name] = data.get(name), loaded[file]
+                changed_content_keys.setdefault(edition['name'], set()).update(
+                    changed_keys(name, old, data[name]))
+
+    def carried_outputs(self, rerun):
+        """Outputs a rebuild keeps without rendering the pages in ``rerun`` again
+
+        The pages in ``rerun`` and the files they generated are left out, so
+        a superseded bundle or image variant goes stale unless a page that is
+        not re-rendered still uses it.
+        """
+        dropped, kept = set(rerun), set()
+        for name, record in self.manifest.outputs.items():
+            (dropped if name in rerun else kept).update(record.get('generated', ()))
+        return set(self.manifest.outputs) - (dropped - kept)
+
+    def rebuild_changed(self, changed):
+        """Rebuild only the outputs that depend on the changed source files"""
+        started = time.perf_counter()
+        self.manifest.produced = set()
+        self.emitted = {}
+        if self.memory is not None:
+            self.memory.begin(clean=False)
+        changed_templates = set()
+        changed_content_keys = {}
+        changed_sources = set()
+        removed = set()
+        rebuild_all = False
+
+        for path in sorted(changed):
+            if path == self.config_path:
+                self.config = self.load_config(self.config_file)
+                # The editions themselves may have changed
+                self.load_edition_content()
+                rebuild_all = True
+            elif self.templates_dir in path.parents:
+                changed_templates.add(path.relative_to(self.templates_dir).as_posix())
+            elif self.content_dir in path.parents:
+                content_file = path.relative_to(self.content_dir).as_posix()
+                loaded = {}
+                for edition in self.editions():
+                    data = self.edition_data.setdefault(edition['name'], {})
+                    for name, file in edition['content_files'].items():
+                        if file != content_file:
+                            continue
+                        if file not in loaded:
+                            loaded[file] = self.prepare_content(self.load_content(file))
+                        old, data[name] = data.get(name), loaded[file]
+                        changed_content_keys.setdefault(edition['name'], set()).update(
+                            changed_keys(name, old, data[name]))
+            elif self.assets_dir in path.parents:
+                changed_sources.add(path)
+                if path.suffix.lower() == ".pdf":
+                    self.reload_program(path, changed_content_keys)
+                output_name = (Path("assets") / path.relative_to(self.assets_dir)).as_posix()
+                if path.exists():
+                    self.copy_asset_files([path])
+                else:
+                    removed.add(output_name)
+
+        if rebuild_all:
+            pages = list(self.edition_pages())
+        else:
+            pages = self.affected_pages(changed_templates, changed_content_keys, changed_sources)
+        # Only what was not re-run is carried over; the rest is produced again if still used
+        collection_templates = {f"templates/{name}" for name in self.collection_templates}
+        rerun = {output_name for _, _, output_name in pages}
+        rerun |= {name for name, record in self.manifest.outputs.items()
+                  if collection_templates & record['inputs'].keys()}
+        self.manifest.produced |= self.carried_outputs(rerun) - removed
+        for edition, template_name, output_name in pages:
+            self.render_page(template_name, output_name, context=dict(self.edition_data[edition['name']]),
+                             edition=edition)
+        # Unchanged collection pages are skipped by their recorded inputs
+        self.render_collections()
+        self.build_search_index()
+        self.purge_stylesheets()
+        self.precompress_outputs()
+        self.remove_stale_outputs()
+        self.manifest.save()
+        self.dimensions.save()
+        if self.memory is not None:
+            self.memory.commit()
+        for listener in self.rebuild_listeners:
+            listener()
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"🔄 Rebuilt {len(pages)} page(s) for {len(changed)} change(s) in {elapsed_ms:.0f} ms")
+
+    def watch(self, stop_event=None):
+        """Poll the sources and rebuild affected outputs whenever something changes"""
+        # Everything is on disk now, so later renders can skip fresh outputs
+        self.incremental = True
+        if not self.edition_data:
+            self.load_edition_content()
+        snapshot = self.source_snapshot()
+        print("👀 Watching templates, content, assets and config for changes...")
+        try:
+            while stop_event is None or not stop_event.is_set():
+                time.sleep(self.watch_interval)
+                current = self.source_snapshot()
+                changed = {path for path in snapshot.keys() | current.keys()
+                           if snapshot.get(path) != current.get(path)}
+                if changed:
+                    snapshot = current
+                    try:
+                        self.rebuild_changed(changed)
+                    except Exception as e:
+                        print(f"❌ Rebuild failed: {e}")
+        except KeyboardInterrupt:
+            print("\n⏹️ Stopped watching")
+
+    def serve(self, port=8000, watching=False):
+        """Serve the site locally for development
+
+        With ``watching`` (watch mode is rebuilding the site), pages get a
+        live-reload script; otherwise files, including precompressed
+        pages, are served exactly as built.
+        """
+        import functools
         import webbrowser
 
-        os.chdir(self.output_dir)
-        handler = http.server.SimpleHTTPRequestHandler
+        # Browsers are told to reload whenever watch mode finishes a rebuild
+        livereload = None
+        if watching:
+            livereload = LiveReload()
+            self.rebuild_listeners.append(livereload.notify)
+        handler = functools.partial(DevRequestHandler, directory=str(self.output_dir),
+                                    livereload=livereload, memory=self.memory)
 
-        with socketserver.TCPServer(("", port), handler) as httpd:
+        with http.server.ThreadingHTTPServer(("", port), handler) as httpd:
             print(f"🚀 Serving at http://localhost:{port}")
             webbrowser.open(f"http://localhost:{port}")
             try:
@@ -146,39 +1367,116 @@ class StaticSiteGenerator:
             except KeyboardInterrupt:
                 print("\n⏹️ Server stopped")
 
-    def deploy_to_github_pages(self):
-        """Deploy to GitHub Pages (optional)"""
+    def deploy_to_github_pages(self, remote=None, branch=None):
+        """Publish the built site to the gh-pages branch
+
+        The branch is written with git plumbing from the outputs in the
+        build manifest, so ``output/`` is never committed to the source
+        branch and each deploy only hashes what changed.
+        """
         if not (self.base_dir / ".git").exists():
             print("❌ Not a git repository. Initialize git first.")
             return
 
+        options = self.config.get('deploy') or {}
+        deployer = GitPagesDeployer(self.base_dir, self.cache_dir / "deploy.json",
+                                    remote=remote or options.get('remote', "origin"),
+                                    branch=branch or options.get('branch', "gh-pages"))
+        files = {name: self.output_dir / name for name in sorted(self.manifest.outputs)}
+        source = deployer.git("rev-parse", "--short", "HEAD", check=False).stdout.strip()
+        message = f"Deploy site from {source}" if source else "Deploy site"
         try:
-            # Add and commit changes
-            subprocess.run(["git", "add", "output/"], check=True)
-            subprocess.run(["git", "commit", "-m", "Update site"], check=True)
+            commit = deployer.deploy(files, message)
+        except (subprocess.CalledProcessError, OSError, ValueError) as e:
+            detail = getattr(e, 'stderr', None) or e
+            print(f"❌ Deployment failed: {str(detail).strip()}")
+            return
+        counts = deployer.counts
+        print(f"Hashed {counts['hashed']} files ({counts['reused_blobs']} unchanged), "
+              f"wrote {counts['trees']} trees ({counts['reused_trees']} reused)")
+        if commit is None:
+            print(f"✅ {deployer.branch} is already up to date")
+        else:
+            print(f"✅ Deployed {commit[:10]} to {deployer.remote} {deployer.branch}!")
+
+    def deploy_to_directory(self, target):
+        """Mirror the built site into a directory, transferring only what changed"""
+        # Output hashes are cached by size/mtime, so unchanged files are only stat'ed
+        digests = BuildManifest(self.cache_dir / "deploy-digests.json")
+        files = {}
+        for name in sorted(self.manifest.outputs):
+            path = self.output_dir / name
+            files[name] = (path, path.stat().st_size, digests.digest(path))
+        digests.save()
+
+        started = time.perf_counter()
+        deployer = DeltaDeployer(DirectoryTarget(target), jobs=self.jobs)
+        counts = deployer.deploy(files)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"✅ Deployed to {deployer.target} in {elapsed_ms:.0f} ms: {counts['added']} added, "
+              f"{counts['changed']} changed, {counts['removed']} removed, {counts['unchanged']} unchanged "
+              f"({counts['bytes'] / 1024:.0f} KiB transferred)")
 
-            # Push to gh-pages branch
-            subprocess.run(["git", "subtree", "push", "--prefix", "output", "origin", "gh-pages"], check=True)
-            print("✅ Deployed to GitHub Pages!")
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Deployment failed: {e}")
 
 def main():
     parser = argparse.ArgumentParser(description="Static Site Generator for European Mobility Symposium")
     parser.add_argument("--config", default="config.yaml", help="Configuration file")
     parser.add_argument("--serve", action="store_true", help="Serve the site locally after building")
     parser.add_argument("--port", type=int, default=8000, help="Port for local server")
+    parser.add_argument("--watch", action="store_true",
+                        help="Rebuild affected pages whenever templates, content, assets or config change")
+    parser.add_argument("--in-memory", action="store_true",
+                        help="Build into memory and serve from there without writing output/ (implies --serve --watch)")
     parser.add_argument("--deploy", action="store_true", help="Deploy to GitHub Pages")
+    parser.add_argument("--deploy-remote", default=None,
+                        help="Remote name, URL or path to deploy to (default: deploy.remote or origin)")
+    parser.add_argument("--deploy-branch", default=None,
+                        help="Branch to deploy to (default: deploy.branch or gh-pages)")
+    parser.add_argument("--deploy-dir", default=None,
+                        help="Mirror the site into this directory, copying only changed files")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only rebuild outputs whose inputs changed since the last build")
+    parser.add_argument("--asset-mode", choices=sorted(AssetSync.MODES), default="auto",
+                        help="How assets are placed in the output: hardlink, reflink, copy or auto")
+    parser.add_argument("--precompile", action="store_true",
+                        help="Compile all templates into the persistent cache and exit")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="Number of build tasks to run in parallel (default: CPU count)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Time every build phase, print a summary and write build-trace.json")
+    parser.add_argument("--prune-store", action="store_true",
+                        help="Delete asset store objects no output links to and exit")
 
     args = parser.parse_args()
 
-    generator = StaticSiteGenerator(args.config)
+    generator = StaticSiteGenerator(args.config, incremental=args.incremental,
+                                    asset_mode=args.asset_mode, jobs=args.jobs,
+                                    in_memory=args.in_memory, profile=args.profile)
+
+    if args.precompile:
+        generator.precompile_templates()
+        return
+    if args.prune_store:
+        generator.prune_store()
+        return
+
     generator.build()
 
-    if args.deploy:
-        generator.deploy_to_github_pages()
+    if args.in_memory:
+        threading.Thread(target=generator.watch, daemon=True).start()
+        generator.serve(args.port, watching=True)
+    elif args.deploy or args.deploy_dir:
+        if args.deploy_dir:
+            generator.deploy_to_directory(args.deploy_dir)
+        if args.deploy:
+            generator.deploy_to_github_pages(args.deploy_remote, args.deploy_branch)
     elif args.serve:
-        generator.serve(args.port)
+        if args.watch:
+            threading.Thread(target=generator.watch, daemon=True).start()
+        generator.serve(args.port, watching=args.watch)
+    elif args.watch:
+        generator.watch()
+
 
 if __name__ == "__main__":
     main()
@@ -7,20 +7,35 @@ Build script for generating the static website using Jinja2 templates
 import os
 import sys
 import json
-import yaml
 import shutil
 import subprocess
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import Environment, FileSystemLoader, TemplateSyntaxError, select_autoescape
 import requests
 from urllib.parse import urljoin, urlparse
 import argparse
 
+# The caches, asset sync and task graph are shared with the main build in ../sitegen
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from sitegen.assets import AssetSync  # noqa: E402
+from sitegen.cache import ContentCache, SourceHashBytecodeCache, parse_yaml  # noqa: E402
+from sitegen.tasks import TaskGraph  # noqa: E402
+
 
 class SiteBuilder:
-    def __init__(self, config_path="config.yaml"):
+    # (template, output) pairs rendered with the shared site context
+    pages = [
+        ('index.html', 'index.html'),
+        ('about.html', 'about.html'),
+        ('program.html', 'program.html'),
+        ('contact.html', 'contact.html')
+    ]
+
+    def __init__(self, config_path="config.yaml", asset_mode="auto", jobs=None):
         self.root_dir = Path(__file__).parent.absolute()
         self.config_path = self.root_dir / config_path
+        self.cache_dir = self.root_dir / ".build-cache"
+        self.content_cache = ContentCache(self.cache_dir / "content")
         self.config = self.load_config()
 
         # Setup paths
@@ -32,17 +47,20 @@ class SiteBuilder:
         self.upper_image_dir = self.root_dir / "upper_image"
         self.sponsors_dir = self.root_dir / "sponsors"
 
-        # Setup Jinja2 environment
+        self.asset_sync = AssetSync(asset_mode)
+        self.jobs = jobs
+
+        # Setup Jinja2 environment; compiled templates persist between runs
         self.jinja_env = Environment(
             loader=FileSystemLoader(str(self.templates_dir)),
-            autoescape=select_autoescape(['html', 'xml'])
+            autoescape=select_autoescape(['html', 'xml']),
+            bytecode_cache=SourceHashBytecodeCache(self.cache_dir / "templates")
         )
 
     def load_config(self):
         """Load site configuration"""
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
+            return self.content_cache.load(self.config_path, parse_yaml)
         except FileNotFoundError:
             print(f"Config file {self.config_path} not found. Using defaults.")
             return self.get_default_config()
@@ -65,18 +83,24 @@ class SiteBuilder:
             }
         }
 
+    def content_files(self):
+        """List the markdown/yaml files that make up the page content"""
+        return sorted(self.content_dir.glob("*.md")) + sorted(self.content_dir.glob("*.yaml"))
+
+    def load_content_file(self, content_file):
+        """Load a single markdown (raw text) or yaml content file"""
+        if content_file.suffix == '.md':
+            with open(content_file, 'r', encoding='utf-8') as f:
+                return f.read()
+        return self.content_cache.load(content_file, parse_yaml)
+
     def load_content(self):
         """Load page content from markdown/yaml files"""
         content = {}
 
         # Load main content
-        for content_file in self.content_dir.glob("*.md"):
-            with open(content_file, 'r', encoding='utf-8') as f:
-                content[content_file.stem] = f.read()
-
-        for content_file in self.content_dir.glob("*.yaml"):
-            with open(content_file, 'r', encoding='utf-8') as f:
-                content[content_file.stem] = yaml.safe_load(f)
+        for content_file in self.content_files():
+            content[content_file.stem] = self.load_content_file(content_file)
 
         return content
 
@@ -113,22 +137,36 @@ class SiteBuilder:
             shutil.rmtree(self.output_dir)
         self.output_dir.mkdir(exist_ok=True)
 
-    def copy_assets(self):
-        """Copy static assets to output directory"""
-        if self.assets_dir.exists():
-            shutil.copytree(self.assets_dir, self.output_dir / "assets", dirs_exist_ok=True)
-
-        # Copy program PDF
-        if self.program_dir.exists():
-            shutil.copytree(self.program_dir, self.output_dir / "program", dirs_exist_ok=True)
+    def asset_groups(self):
+        """Map each output asset directory to its source directory"""
+        return [
+            (self.assets_dir, "assets"),
+            (self.program_dir, "program"),
+            (self.upper_image_dir, "upper_image"),
+            (self.sponsors_dir, "sponsors"),
+        ]
 
-        # Copy upper image
-        if self.upper_image_dir.exists():
-            shutil.copytree(self.upper_image_dir, self.output_dir / "upper_image", dirs_exist_ok=True)
+    def copy_asset_group(self, source_dir, dest_name):
+        """Sync one asset directory into the output directory"""
+        if source_dir.exists():
+            self.asset_sync.sync_tree(source_dir, self.output_dir / dest_name)
 
-        # Copy sponsors
-        if self.sponsors_dir.exists():
-            shutil.copytree(self.sponsors_dir, self.output_dir / "sponsors", dirs_exist_ok=True)
+    def copy_assets(self):
+        """Sync static assets, program, header image and sponsors into the output directory"""
+        for source_dir, dest_name in self.asset_groups():
+            self.copy_asset_group(source_dir, dest_name)
+
+        print(f"Synced assets ({self.asset_sync.summary() or 'nothing to do'})")
+
+    def precompile_templates(self):
+        """Compile every template into the bytecode cache ahead of time"""
+        names = self.jinja_env.list_templates()
+        for name in names:
+            try:
+                self.jinja_env.get_template(name)
+            except TemplateSyntaxError as e:
+                print(f"Warning: Could not compile {name}: {e}")
+        print(f"Precompiled {len(names)} templates into {self.cache_dir / 'templates'}")
 
     def render_template(self, template_name, context, output_path):
         """Render a template with context and save to output path"""
@@ -143,41 +181,65 @@ class SiteBuilder:
 
         print(f"Generated: {output_path}")
 
-    def build_site(self):
-        """Build the complete site"""
-        print("Building European Mobility Symposium website...")
-
-        # Clean and prepare output directory
-        self.clean_output()
-
-        # Copy static assets
-        self.copy_assets()
-
-        # Load content
-        content = self.load_content()
-
-        # Prepare template context
-        context = {
+    def build_context(self, *content_items):
+        """Prepare the template context shared by every page"""
+        return {
             'config': self.config,
-            'content': content,
+            'content': dict(content_items),
             'sponsors': self.get_sponsors(),
             'upper_image': self.get_upper_image(),
             'program_pdf': self.get_program_pdf()
         }
 
+    def render_page(self, template_name, output_name, context):
+        """Render one entry of ``pages`` if its template exists"""
+        if (self.templates_dir / template_name).exists():
+            self.render_template(template_name, context, output_name)
+        else:
+            print(f"Warning: Template {template_name} not found")
+
+    def build_graph(self, clean=False):
+        """Describe the build as a graph of tasks that can run in parallel"""
+        graph = TaskGraph(self.jobs)
+
+        # Assets are synced in place, so only wipe the output when asked to
+        graph.add('output', self.clean_output if clean else lambda: self.output_dir.mkdir(exist_ok=True))
+
+        # Load content, one task per file
+        content_tasks = []
+        for content_file in self.content_files():
+            content_tasks.append(graph.add(
+                f'content:{content_file.name}',
+                lambda f=content_file: (f.stem, self.load_content_file(f)),
+            ))
+        graph.add('context', self.build_context, deps=content_tasks)
+
+        # Copy static assets, one task per asset directory
+        asset_tasks = []
+        for source_dir, dest_name in self.asset_groups():
+            asset_tasks.append(graph.add(
+                f'assets:{dest_name}',
+                lambda _, s=source_dir, d=dest_name: self.copy_asset_group(s, d),
+                deps=['output'],
+            ))
+
         # Render pages
-        pages = [
-            ('index.html', 'index.html'),
-            ('about.html', 'about.html'),
-            ('program.html', 'program.html'),
-            ('contact.html', 'contact.html')
-        ]
+        for template_name, output_name in self.pages:
+            graph.add(
+                f'page:{output_name}',
+                lambda context, _, t=template_name, o=output_name: self.render_page(t, o, context),
+                deps=['context', 'output'],
+            )
+
+        graph.add('assets', lambda *_: print(
+            f"Synced assets ({self.asset_sync.summary() or 'nothing to do'})"), deps=asset_tasks)
+        return graph
+
+    def build_site(self, clean=False):
+        """Build the complete site"""
+        print("Building European Mobility Symposium website...")
 
-        for template_name, output_name in pages:
-            if (self.templates_dir / template_name).exists():
-                self.render_template(template_name, context, output_name)
-            else:
-                print(f"Warning: Template {template_name} not found")
+        self.build_graph(clean).run()
 
         print("Site build completed successfully!")
 
@@ -222,24 +284,32 @@ class SiteBuilder:
 
 def main():
     parser = argparse.ArgumentParser(description='European Mobility Symposium Site Builder')
-    parser.add_argument('command', choices=['build', 'serve', 'deploy'], 
+    parser.add_argument('command', choices=['build', 'serve', 'deploy', 'precompile'], 
                        help='Command to execute')
     parser.add_argument('--port', type=int, default=8000, 
                        help='Port for local server (default: 8000)')
     parser.add_argument('--config', default='config.yaml',
                        help='Configuration file path')
+    parser.add_argument('--clean', action='store_true',
+                       help='Remove the output directory before building')
+    parser.add_argument('--asset-mode', choices=sorted(AssetSync.MODES), default='auto',
+                       help='How assets are placed in the output: hardlink, reflink, copy or auto')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                       help='Number of build tasks to run in parallel (default: CPU count)')
 
     args = parser.parse_args()
 
-    builder = SiteBuilder(args.config)
+    builder = SiteBuilder(args.config, asset_mode=args.asset_mode, jobs=args.jobs)
 
     if args.command == 'build':
-        builder.build_site()
+        builder.build_site(clean=args.clean)
     elif args.command == 'serve':
-        builder.build_site()
+        builder.build_site(clean=args.clean)
         builder.serve_locally(args.port)
+    elif args.command == 'precompile':
+        builder.precompile_templates()
     elif args.command == 'deploy':
-        builder.build_site()
+        builder.build_site(clean=args.clean)
         builder.deploy_to_github()
 
 
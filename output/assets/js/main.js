@@ -1,190 +0,0 @@
-// Custom JavaScript for European Mobility Symposium
-
-document.addEventListener('DOMContentLoaded', function() {
-
-    // Smooth scrolling for navigation links
-    const navLinks = document.querySelectorAll('.navbar-nav .nav-link[href^="#"]');
-
-    navLinks.forEach(link => {
-        link.addEventListener('click', function(e) {
-            e.preventDefault();
-
-            const targetId = this.getAttribute('href');
-            const targetSection = document.querySelector(targetId);
-
-            if (targetSection) {
-                const offsetTop = targetSection.offsetTop - 70; // Account for fixed navbar
-
-                window.scrollTo({
-                    top: offsetTop,
-                    behavior: 'smooth'
-                });
-
-                // Close mobile menu if open
-                const navbarCollapse = document.querySelector('.navbar-collapse');
-                if (navbarCollapse.classList.contains('show')) {
-                    const bsCollapse = new bootstrap.Collapse(navbarCollapse);
-                    bsCollapse.hide();
-                }
-            }
-        });
-    });
-
-    // Active navigation highlighting
-    function updateActiveNav() {
-        const sections = document.querySelectorAll('section[id]');
-        const navLinks = document.querySelectorAll('.navbar-nav .nav-link');
-
-        let current = '';
-        sections.forEach(section => {
-            const sectionTop = section.offsetTop - 100;
-            if (window.pageYOffset >= sectionTop) {
-                current = section.getAttribute('id');
-            }
-        });
-
-        navLinks.forEach(link => {
-            link.classList.remove('active');
-            if (link.getAttribute('href') === '#' + current) {
-                link.classList.add('active');
-            }
-        });
-    }
-
-    // Update active navigation on scroll
-    window.addEventListener('scroll', updateActiveNav);
-    updateActiveNav(); // Initial call
-
-    // Card hover effects
-    const cards = document.querySelectorAll('.card');
-    cards.forEach(card => {
-        card.addEventListener('mouseenter', function() {
-            this.style.transform = 'translateY(-5px)';
-        });
-
-        card.addEventListener('mouseleave', function() {
-            this.style.transform = 'translateY(0)';
-        });
-    });
-
-    // Lazy loading for iframe (Google Maps)
-    const iframe = document.querySelector('iframe');
-    if (iframe) {
-        const observer = new IntersectionObserver((entries) => {
-            entries.forEach(entry => {
-                if (entry.isIntersecting) {
-                    // Map is visible, you could add additional loading logic here
-                    observer.unobserve(entry.target);
-                }
-            });
-        });
-
-        observer.observe(iframe);
-    }
-
-    // Tooltip initialization for Bootstrap tooltips
-    const tooltipTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'));
-    const tooltipList = tooltipTriggerList.map(function (tooltipTriggerEl) {
-        return new bootstrap.Tooltip(tooltipTriggerEl);
-    });
-
-    // Popover initialization for Bootstrap popovers
-    const popoverTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="popover"]'));
-    const popoverList = popoverTriggerList.map(function (popoverTriggerEl) {
-        return new bootstrap.Popover(popoverTriggerEl);
-    });
-
-    // Back to top button (optional enhancement)
-    function createBackToTopButton() {
-        const backToTopBtn = document.createElement('button');
-        backToTopBtn.innerHTML = '<i class="fas fa-chevron-up"></i>';
-        backToTopBtn.className = 'btn btn-primary btn-floating';
-        backToTopBtn.style.cssText = `
-            position: fixed;
-            bottom: 20px;
-            right: 20px;
-            z-index: 1000;
-            border-radius: 50%;
-            width: 50px;
-            height: 50px;
-            display: none;
-            opacity: 0.8;
-            transition: opacity 0.3s ease;
-        `;
-
-        backToTopBtn.addEventListener('click', function() {
-            window.scrollTo({
-                top: 0,
-                behavior: 'smooth'
-            });
-        });
-
-        // Show/hide based on scroll position
-        window.addEventListener('scroll', function() {
-            if (window.pageYOffset > 300) {
-                backToTopBtn.style.display = 'block';
-            } else {
-                backToTopBtn.style.display = 'none';
-            }
-        });
-
-        document.body.appendChild(backToTopBtn);
-    }
-
-    // Uncomment to enable back-to-top button
-    // createBackToTopButton();
-
-    // Console message for developers
-    console.log('%c European Mobility Symposium Website ', 'background: #0d6efd; color: white; font-size: 16px; padding: 4px 8px; border-radius: 4px;');
-    console.log('Built with Python, Jinja2, and Bootstrap 5');
-    console.log('Source: https://github.com/username/european-mobility-symposium');
-
-    // Performance monitoring (optional)
-    if ('performance' in window) {
-        window.addEventListener('load', function() {
-            setTimeout(function() {
-                const loadTime = performance.timing.loadEventEnd - performance.timing.navigationStart;
-                console.log('Page load time:', loadTime + 'ms');
-            }, 0);
-        });
-    }
-
-    // Error handling for external resources
-    window.addEventListener('error', function(e) {
-        if (e.target.tagName === 'LINK' || e.target.tagName === 'SCRIPT') {
-            console.warn('Failed to load external resource:', e.target.src || e.target.href);
-        }
-    });
-
-});
-
-// Utility functions
-const EMS = {
-    // Utility to format dates
-    formatDate: function(dateString) {
-        const options = { year: 'numeric', month: 'long', day: 'numeric' };
-        return new Date(dateString).toLocaleDateString('en-US', options);
-    },
-
-    // Utility to copy text to clipboard
-    copyToClipboard: function(text) {
-        if (navigator.clipboard) {
-            navigator.clipboard.writeText(text).then(function() {
-                console.log('Text copied to clipboard');
-            });
-        }
-    },
-
-    // Utility to share page
-    sharePage: function() {
-        if (navigator.share) {
-            navigator.share({
-                title: document.title,
-                url: window.location.href
-            });
-        }
-    }
-};
-
-// Make EMS utilities available globally
-window.EMS = EMS;
@@ -0,0 +1 @@
+"""Building blocks of the symposium site generator; ``build.py`` puts them together"""
@@ -0,0 +1,267 @@
+"""Asset placement: hardlink/reflink sync, the content-addressed store and precompression"""
+
+import os
+import shutil
+import hashlib
+import gzip
+import threading
+from pathlib import Path
+from .cache import file_digest, write_if_changed
+
+
+# Brotli is optional; without it only gzip side files are written
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class AssetSync:
+    """Mirror source files into the output tree as cheaply as possible
+
+    Unchanged files are detected by inode, then size/mtime, falling back to
+    content hashes. Changed files are materialised as hardlinks or
+    copy-on-write reflinks when source and output share a filesystem, and
+    copied byte-for-byte otherwise.
+    """
+
+    MODES = {
+        'auto': ('hardlink', 'reflink', 'copy'),
+        'hardlink': ('hardlink', 'copy'),
+        'reflink': ('reflink', 'copy'),
+        'copy': ('copy',),
+    }
+
+    # Linux FICLONE ioctl request number
+    FICLONE = 0x40049409
+
+    def __init__(self, mode="auto"):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown asset sync mode: {mode}")
+        self.mode = mode
+        self.unsupported = set()
+        self.counts = dict.fromkeys(('hardlink', 'reflink', 'copy', 'skipped', 'removed'), 0)
+        self._lock = threading.Lock()
+
+    def count(self, name):
+        """Increment a counter; syncs may run on several threads at once"""
+        with self._lock:
+            self.counts[name] += 1
+
+    def is_current(self, src, dest):
+        """Check whether ``dest`` already holds the contents of ``src``"""
+        try:
+            dst_st = os.stat(dest)
+        except FileNotFoundError:
+            return False
+        src_st = os.stat(src)
+        if (src_st.st_dev, src_st.st_ino) == (dst_st.st_dev, dst_st.st_ino):
+            return True
+        if src_st.st_size != dst_st.st_size:
+            return False
+        if src_st.st_mtime_ns == dst_st.st_mtime_ns:
+            return True
+        return file_digest(src) == file_digest(dest)
+
+    def sync_file(self, src, dest):
+        """Bring ``dest`` up to date with ``src``; returns True if it was replaced"""
+        if self.is_current(src, dest):
+            self.count('skipped')
+            return False
+        self.place(src, dest)
+        return True
+
+    def place(self, src, dest):
+        """Materialise ``src`` at ``dest`` using the cheapest available method"""
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = dest.with_name(f".{dest.name}.tmp")
+        for method in self.MODES[self.mode]:
+            if method in self.unsupported:
+                continue
+            if tmp_path.exists():
+                tmp_path.unlink()
+            try:
+                getattr(self, f"_{method}")(src, tmp_path)
+            except OSError:
+                # Cross-device links and filesystems without reflink support
+                # fail the same way for every file, so stop trying them
+                if method == 'copy':
+                    raise
+                self.unsupported.add(method)
+                continue
+            os.replace(tmp_path, dest)
+            self.count(method)
+            return method
+
+    def _hardlink(self, src, dest):
+        os.link(src, dest)
+
+    def _reflink(self, src, dest):
+        try:
+            import fcntl
+        except ImportError:
+            raise OSError("reflinks are not supported on this platform")
+        try:
+            with open(src, 'rb') as s, open(dest, 'wb') as d:
+                fcntl.ioctl(d.fileno(), self.FICLONE, s.fileno())
+        except OSError:
+            if os.path.exists(dest):
+                os.unlink(dest)
+            raise
+        shutil.copystat(src, dest)
+
+    def _copy(self, src, dest):
+        shutil.copy2(src, dest)
+
+    def sync_tree(self, src_dir, dest_dir, prune=True):
+        """Mirror ``src_dir`` into ``dest_dir``
+
+        Returns ``(relative_path, source_path)`` pairs for every file in the
+        source tree. With ``prune`` set, files in ``dest_dir`` that no longer
+        exist in ``src_dir`` are deleted.
+        """
+        src_dir, dest_dir = Path(src_dir), Path(dest_dir)
+        synced = []
+        for src in sorted(src_dir.rglob("*")):
+            if src.is_file():
+                rel = src.relative_to(src_dir).as_posix()
+                self.sync_file(src, dest_dir / rel)
+                synced.append((rel, src))
+        if prune and dest_dir.exists():
+            wanted = {rel for rel, _ in synced}
+            for dest in sorted(dest_dir.rglob("*"), reverse=True):
+                rel = dest.relative_to(dest_dir).as_posix()
+                if dest.is_file() and rel not in wanted:
+                    dest.unlink()
+                    self.count('removed')
+                elif dest.is_dir() and not any(dest.iterdir()):
+                    dest.rmdir()
+        return synced
+
+    def summary(self):
+        """Return a short human-readable summary of the work done"""
+        return ", ".join(f"{count} {name}" for name, count in self.counts.items() if count)
+
+
+def compress_bytes(data, encoding):
+    """Compress ``data`` at the highest level for a ``Content-Encoding``"""
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    # A fixed mtime keeps gzip output reproducible
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+class AssetStore:
+    """Content-addressed store that output files are hardlinked from
+
+    Every file is kept once, as ``<digest[:2]>/<digest[2:]>`` under
+    ``directory``, however many outputs, editions, builds or checkouts use
+    it. Objects never change once written, so any number of outputs can
+    share their inode. Build-cache files are only ever replaced atomically
+    and are linked in directly; other sources are reflinked or copied, so
+    editing a source in place cannot alter an object.
+    """
+
+    def __init__(self, directory, mode="auto"):
+        self.directory = Path(directory)
+        self.linker = AssetSync(mode)
+        self.cloner = AssetSync('copy' if mode == 'copy' else 'reflink')
+        self.counts = dict.fromkeys(('stored', 'reused'), 0)
+        self._lock = threading.Lock()
+
+    def object_path(self, digest):
+        return self.directory / digest[:2] / digest[2:]
+
+    def lookup(self, digest, size):
+        """Return the object for ``digest`` if it is stored (and intact), else None"""
+        path = self.object_path(digest)
+        try:
+            if path.stat().st_size == size:
+                with self._lock:
+                    self.counts['reused'] += 1
+                return path
+        except OSError:
+            pass
+        return None
+
+    def add_file(self, src, digest, link=False):
+        """Store a file under its digest and return the object path"""
+        path = self.lookup(digest, os.stat(src).st_size)
+        if path is None:
+            path = self.object_path(digest)
+            with self._lock:
+                (self.linker if link else self.cloner).place(src, path)
+                self.counts['stored'] += 1
+        return path
+
+    def add_bytes(self, data):
+        """Store generated bytes and return the object path"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.lookup(digest, len(data))
+        if path is None:
+            path = self.object_path(digest)
+            with self._lock:
+                write_if_changed(path, data)
+                self.counts['stored'] += 1
+        return path
+
+    def summary(self):
+        return f"{self.counts['stored']} stored, {self.counts['reused']} reused"
+
+    def prune(self):
+        """Delete objects that nothing links to any more; returns ``(files, bytes)`` removed
+
+        Outputs placed by copy (e.g. on another filesystem) do not count as
+        links, so their objects are removed too and stored again when needed.
+        """
+        removed = size = 0
+        for path in sorted(self.directory.glob("*/*")):
+            st = path.stat()
+            if st.st_nlink == 1:
+                path.unlink()
+                removed += 1
+                size += st.st_size
+        return removed, size
+
+
+class Precompressor:
+    """Gzip/brotli side files for compressible outputs, cached by content digest
+
+    Each result is stored once per digest and encoding in ``directory``; an
+    empty file records that compression did not make the output smaller.
+    """
+
+    suffixes = ('.html', '.css', '.js', '.svg', '.json')
+
+    def __init__(self, directory, persist=True):
+        self.directory = Path(directory)
+        self.persist = persist
+
+    @property
+    def encodings(self):
+        """``(Content-Encoding, file suffix)`` pairs that can be produced"""
+        encodings = [("gzip", ".gz")]
+        if brotli is not None:
+            encodings.insert(0, ("br", ".br"))
+        return encodings
+
+    def compress(self, load, digest, encoding, suffix):
+        """Return the compressed output (bytes or cached path), or None if it is not smaller
+
+        ``load`` is only called when the result is not cached yet.
+        """
+        cache_path = self.directory / f"{digest}{suffix}"
+        if self.persist:
+            try:
+                return cache_path if cache_path.stat().st_size else None
+            except OSError:
+                pass
+        data = load()
+        compressed = compress_bytes(data, encoding)
+        if len(compressed) >= len(data):
+            compressed = b""
+        if self.persist:
+            write_if_changed(cache_path, compressed)
+            return cache_path if compressed else None
+        return compressed or None
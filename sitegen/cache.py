@@ -0,0 +1,339 @@
+"""Source digests, parsed-content and template caches, and the build manifest"""
+
+import os
+import json
+import yaml
+import hashlib
+import pickle
+import threading
+import filecmp
+from pathlib import Path
+from jinja2 import FileSystemBytecodeCache
+from jinja2.bccache import Bucket
+
+
+# Prefer the libyaml C loader, which parses large files several times faster
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+
+def file_digest(path):
+    """Return the SHA-256 hex digest of a file's contents"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def context_digest(context):
+    """Return a stable digest of a template context"""
+    payload = json.dumps(context, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def parse_yaml(text):
+    """Parse YAML text with the fastest available safe loader"""
+    return yaml.load(text, Loader=YamlLoader)
+
+
+class ContentCache:
+    """Parsed data files cached on disk, keyed by path, stat and content hash
+
+    A file whose size and mtime are unchanged is served from the cache
+    without being read. If only the stat changed (e.g. after a checkout),
+    the content hash is compared before re-parsing. Parsed results are
+    stored pickled, which is far cheaper to load than YAML is to parse.
+    """
+
+    def __init__(self, directory, persist=True):
+        self.directory = Path(directory)
+        self.persist = persist
+        self.memory = {}
+
+    def entry_path(self, path):
+        key = hashlib.sha1(str(Path(path).resolve()).encode('utf-8')).hexdigest()
+        return self.directory / f"{key}.pickle"
+
+    def read_entry(self, path):
+        key = str(Path(path).resolve())
+        if key in self.memory:
+            return self.memory[key]
+        try:
+            with open(self.entry_path(path), 'rb') as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            return None
+        self.memory[key] = entry
+        return entry
+
+    def write_entry(self, path, entry):
+        self.memory[str(Path(path).resolve())] = entry
+        if not self.persist:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry_path = self.entry_path(path)
+        tmp_path = entry_path.with_name(f".{entry_path.name}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, entry_path)
+
+    def load(self, path, parser):
+        """Return the parsed contents of ``path``, parsing only when it changed"""
+        st = os.stat(path)
+        entry = self.read_entry(path)
+        if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+            return pickle.loads(entry['data'])
+
+        with open(path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        if entry and entry['digest'] == digest:
+            data = entry['data']
+        else:
+            data = pickle.dumps(parser(raw.decode('utf-8')), protocol=pickle.HIGHEST_PROTOCOL)
+        self.write_entry(path, {'size': st.st_size, 'mtime_ns': st.st_mtime_ns,
+                                'digest': digest, 'data': data})
+        # Hand out a fresh copy so callers can mutate the result freely
+        return pickle.loads(data)
+
+
+class BuildManifest:
+    """Persistent record of the inputs behind every generated output file
+
+    Each output is stored with the digests of the inputs it was produced
+    from and the size/mtime it had when written.  Source digests are cached
+    by size/mtime so an unchanged tree is checked with ``stat`` calls only.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.files = {}
+        self.outputs = {}
+        self.produced = set()
+        self.dirty = False
+        self.persist = True
+        self.load()
+
+    def load(self):
+        """Load the manifest from disk, ignoring missing or stale files"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') != self.VERSION:
+            return
+        self.files = data.get('files', {})
+        self.outputs = data.get('outputs', {})
+
+    def save(self):
+        """Write the manifest atomically, but only if something changed"""
+        if not self.dirty or not self.persist:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'files': self.files,
+                       'outputs': self.outputs}, f, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def digest(self, path):
+        """Return the digest of a source file, reusing it while its stat is unchanged"""
+        path = Path(path)
+        st = path.stat()
+        key = str(path)
+        cached = self.files.get(key)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        digest = file_digest(path)
+        self.files[key] = [st.st_size, st.st_mtime_ns, digest]
+        self.dirty = True
+        return digest
+
+    def is_fresh(self, output_name, output_path, inputs):
+        """Check whether an output exists untouched and was built from ``inputs``"""
+        record = self.outputs.get(output_name)
+        if record is None or record['inputs'] != inputs:
+            return False
+        try:
+            st = Path(output_path).stat()
+        except OSError:
+            return False
+        if st.st_size != record['size'] or st.st_mtime_ns != record['mtime_ns']:
+            return False
+        # Inputs discovered while rendering (e.g. images used by template helpers)
+        # A digest of None records that the file did not exist
+        for path, digest in record.get('discovered', {}).items():
+            try:
+                current = self.digest(path)
+            except OSError:
+                current = None
+            if current != digest:
+                return False
+        return True
+
+    def keep(self, output_name):
+        """Mark an up-to-date output as part of the current build"""
+        self.produced.add(output_name)
+
+    def record(self, output_name, output_path, inputs, content_keys=None,
+               discovered=None, generated=None):
+        """Remember the inputs and on-disk state of a freshly written output
+
+        ``output_path`` is None for outputs that only exist in memory.
+        ``discovered`` maps source files found while rendering to their
+        digests, and ``generated`` lists extra outputs emitted on the way.
+        """
+        st = Path(output_path).stat() if output_path is not None else None
+        self.outputs[output_name] = {
+            'inputs': inputs,
+            'size': st.st_size if st else None,
+            'mtime_ns': st.st_mtime_ns if st else None,
+        }
+        if content_keys is not None:
+            self.outputs[output_name]['content_keys'] = sorted(content_keys)
+        if discovered:
+            self.outputs[output_name]['discovered'] = dict(sorted(discovered.items()))
+        if generated:
+            self.outputs[output_name]['generated'] = sorted(set(generated))
+        self.produced.add(output_name)
+        self.dirty = True
+
+    def reset(self):
+        """Forget every recorded output (used for clean builds)"""
+        if self.outputs:
+            self.outputs = {}
+            self.dirty = True
+        self.produced = set()
+
+    def stale_outputs(self):
+        """Return outputs recorded by a previous build but not produced by this one"""
+        return sorted(set(self.outputs) - self.produced)
+
+    def forget(self, output_name):
+        """Drop an output from the manifest"""
+        if self.outputs.pop(output_name, None) is not None:
+            self.dirty = True
+
+
+class TrackingDict(dict):
+    """Dictionary that records which of its keys a template reads
+
+    Accesses are added to ``accessed`` as ``"<prefix>.<key>"``; iterating
+    over the whole mapping is recorded as ``"<prefix>.*"``.
+    """
+
+    def __init__(self, data, accessed, prefix):
+        super().__init__(data)
+        self._accessed = accessed
+        self._prefix = prefix
+
+    def __getitem__(self, key):
+        self._accessed.add(f"{self._prefix}.{key}")
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self._accessed.add(f"{self._prefix}.{key}")
+        return super().get(key, default)
+
+    def __iter__(self):
+        self._accessed.add(f"{self._prefix}.*")
+        return super().__iter__()
+
+    def keys(self):
+        self._accessed.add(f"{self._prefix}.*")
+        return super().keys()
+
+    def values(self):
+        self._accessed.add(f"{self._prefix}.*")
+        return super().values()
+
+    def items(self):
+        self._accessed.add(f"{self._prefix}.*")
+        return super().items()
+
+
+def changed_keys(name, old, new):
+    """Return the ``"<name>.<key>"`` entries that differ between two content versions"""
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return {f"{name}.*"}
+    keys = {f"{name}.{key}" for key in old.keys() | new.keys() if old.get(key) != new.get(key)}
+    if keys and old.keys() != new.keys():
+        keys.add(f"{name}.*")
+    return keys
+
+
+def write_if_changed(path, data):
+    """Write bytes to ``path`` unless the file already holds exactly these bytes
+
+    The file is replaced atomically rather than rewritten in place, so an
+    output that is hardlinked to a source file never modifies the source.
+    Returns True when the file was (re)written.
+    """
+    path = Path(path)
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Per-thread name, as outputs with identical bytes share a cache path
+    tmp_path = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def stream_if_changed(path, chunks):
+    """Write text chunks to ``path`` as they arrive, keeping the old file if identical
+
+    Only one chunk is held in memory at a time. Like ``write_if_changed``,
+    the file is replaced atomically. Returns True when the file changed.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        for chunk in chunks:
+            f.write(chunk.encode('utf-8'))
+    try:
+        if filecmp.cmp(tmp_path, path, shallow=False):
+            tmp_path.unlink()
+            return False
+    except OSError:
+        pass
+    os.replace(tmp_path, path)
+    return True
+
+
+class SourceHashBytecodeCache(FileSystemBytecodeCache):
+    """On-disk cache of compiled templates keyed by template name and source hash
+
+    Unlike Jinja's default path-based keys, the cache stays valid across
+    checkouts, editions and branches as long as the template source is the
+    same, and an edited template simply gets a new entry.
+    """
+
+    def __init__(self, directory, persist=True):
+        self.persist = persist
+        if persist:
+            Path(directory).mkdir(parents=True, exist_ok=True)
+        super().__init__(str(directory))
+
+    def dump_bytecode(self, bucket):
+        if self.persist:
+            super().dump_bytecode(bucket)
+
+    def get_bucket(self, environment, name, filename, source):
+        checksum = self.get_source_checksum(source)
+        key = hashlib.sha1(f"{name}\0{checksum}".encode('utf-8')).hexdigest()
+        bucket = Bucket(environment, key, checksum)
+        self.load_bytecode(bucket)
+        return bucket
@@ -0,0 +1,270 @@
+"""Deployers: git plumbing for GitHub Pages and manifest-based delta sync to a directory"""
+
+import os
+import json
+import shutil
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+import subprocess
+
+
+class GitPagesDeployer:
+    """Publish a built site to a branch with git plumbing commands
+
+    The branch's tree is assembled straight from the output files: blobs are
+    hashed only for files whose size/mtime changed since the last deploy,
+    directories whose entries are unchanged reuse their tree objects, and
+    the result is a single ``commit-tree`` on top of the branch's previous
+    commit. Neither the working tree, the index nor the source branch are
+    touched. ``remote`` may be a remote name, a URL or a local path.
+    """
+
+    def __init__(self, repo_dir, cache_path, remote="origin", branch="gh-pages"):
+        self.repo_dir = Path(repo_dir)
+        self.cache_path = Path(cache_path)
+        self.remote = remote
+        self.branch = branch
+        # Private ref keeping deployed commits (and the cached objects) reachable
+        self.ref = f"refs/site-deploy/{branch}"
+        self.counts = dict.fromkeys(('hashed', 'reused_blobs', 'trees', 'reused_trees'), 0)
+
+    def git(self, *args, input=None, env=None, check=True):
+        """Run a git command in the repository and return its stdout"""
+        result = subprocess.run(["git", *args], cwd=self.repo_dir, input=input, capture_output=True,
+                                text=True, encoding='utf-8', env=env, check=check)
+        return result.stdout.strip() if check else result
+
+    def exists(self, oid):
+        return self.git("cat-file", "-e", oid, check=False).returncode == 0
+
+    def load_cache(self):
+        """Cached blob/tree ids, trusted only while the commit they came from exists"""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {'blobs': {}, 'trees': {}}
+        if cache.get('ref') != self.ref or not cache.get('commit') or not self.exists(cache['commit']):
+            return {'blobs': {}, 'trees': {}}
+        return cache
+
+    def save_cache(self, commit, blobs, trees):
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'ref': self.ref, 'commit': commit, 'blobs': blobs, 'trees': trees}, f, sort_keys=True)
+        os.replace(tmp_path, self.cache_path)
+
+    def hash_blobs(self, files, cache):
+        """Map output names to ``(mode, blob id)``, hashing only files that changed"""
+        blobs, pending = {}, []
+        for name, path in files.items():
+            if "\n" in name or "\t" in name:
+                raise ValueError(f"Cannot deploy a file name containing a tab or newline: {name!r}")
+            st = path.stat()
+            mode = "100755" if st.st_mode & 0o111 else "100644"
+            cached = cache.get(name)
+            if cached and cached[:3] == [st.st_size, st.st_mtime_ns, mode]:
+                blobs[name] = cached
+                self.counts['reused_blobs'] += 1
+            else:
+                blobs[name] = [st.st_size, st.st_mtime_ns, mode, None]
+                pending.append(name)
+        if pending:
+            paths = "\n".join(str(files[name].absolute()) for name in pending) + "\n"
+            oids = self.git("hash-object", "-w", "--no-filters", "--stdin-paths", input=paths).split()
+            for name, oid in zip(pending, oids):
+                blobs[name][3] = oid
+            self.counts['hashed'] += len(pending)
+        return blobs
+
+    def write_trees(self, entries, cache, used):
+        """Write the tree of every directory bottom-up and return the root tree id
+
+        ``cache`` maps a hash of a directory listing to its tree id; the
+        entries this deploy needs are copied into ``used``.
+        """
+        directories = {"": {}}
+        for name, (mode, oid) in entries.items():
+            parent = ""
+            for part in name.split("/")[:-1]:
+                path = f"{parent}{part}/"
+                if path not in directories:
+                    directories[path] = {}
+                    directories[parent][part] = ("040000", "tree", path)
+                parent = path
+            directories[parent][name.rsplit("/", 1)[-1]] = (mode, "blob", oid)
+
+        trees = {}
+        mktree = None
+        try:
+            for path in sorted(directories, key=lambda p: p.count("/"), reverse=True):
+                listing = "".join(
+                    f"{mode} {kind} {trees[ref] if kind == 'tree' else ref}\t{name}\n"
+                    for name, (mode, kind, ref) in sorted(directories[path].items())
+                )
+                key = hashlib.sha256(listing.encode('utf-8')).hexdigest()
+                if key in cache:
+                    self.counts['reused_trees'] += 1
+                else:
+                    if mktree is None:
+                        mktree = subprocess.Popen(["git", "mktree", "--batch"], cwd=self.repo_dir, text=True,
+                                                  encoding='utf-8', stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+                    mktree.stdin.write(listing + "\n")
+                    mktree.stdin.flush()
+                    cache[key] = mktree.stdout.readline().strip()
+                    self.counts['trees'] += 1
+                trees[path] = cache[key]
+                used[key] = cache[key]
+        finally:
+            if mktree is not None:
+                mktree.stdin.close()
+                if mktree.wait():
+                    raise subprocess.CalledProcessError(mktree.returncode, "git mktree --batch")
+        return trees[""]
+
+    def previous_commit(self):
+        """The branch's current commit on the remote, fetched if it is not local yet"""
+        heads = self.git("ls-remote", "--heads", self.remote, f"refs/heads/{self.branch}")
+        if not heads:
+            return None
+        oid = heads.split()[0]
+        if not self.exists(oid):
+            self.git("fetch", "--no-tags", self.remote, f"+refs/heads/{self.branch}:{self.ref}")
+        return oid
+
+    def identity(self):
+        """Environment for commit-tree, with a fallback identity when none is configured"""
+        env = dict(os.environ)
+        if self.git("config", "user.name", check=False).returncode:
+            env.setdefault("GIT_AUTHOR_NAME", "Site Builder")
+            env.setdefault("GIT_COMMITTER_NAME", "Site Builder")
+        if self.git("config", "user.email", check=False).returncode:
+            env.setdefault("GIT_AUTHOR_EMAIL", "site-builder@localhost")
+            env.setdefault("GIT_COMMITTER_EMAIL", "site-builder@localhost")
+        return env
+
+    def deploy(self, files, message):
+        """Commit ``files`` (output name -> path) to the branch and push it
+
+        Returns the new commit id, or None when the site is unchanged.
+        """
+        cache = self.load_cache()
+        blobs = self.hash_blobs(files, cache['blobs'])
+        entries = {name: (mode, oid) for name, (_, _, mode, oid) in blobs.items()}
+        if ".nojekyll" not in entries:
+            # Serve files and directories starting with "_" as they are
+            entries[".nojekyll"] = ("100644", self.git("hash-object", "-w", "--stdin", input=""))
+        trees = {}
+        tree = self.write_trees(entries, cache['trees'], trees)
+
+        parent = self.previous_commit()
+        if parent is not None and self.git("rev-parse", f"{parent}^{{tree}}") == tree:
+            self.save_cache(parent, blobs, trees)
+            return None
+        args = ["commit-tree", tree, "-m", message]
+        if parent is not None:
+            args += ["-p", parent]
+        commit = self.git(*args, env=self.identity())
+        self.git("push", "--quiet", self.remote, f"{commit}:refs/heads/{self.branch}")
+        self.git("update-ref", self.ref, commit)
+        self.save_cache(commit, blobs, trees)
+        return commit
+
+
+class DirectoryTarget:
+    """Deploy target backed by a directory, e.g. a mounted static host
+
+    Other targets (rsync, object storage) only need the same four methods.
+    Every write is atomic, so readers never see a half-written file.
+    """
+
+    manifest_name = ".site-manifest.json"
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def __str__(self):
+        return str(self.root)
+
+    def read_manifest(self):
+        """Return ``{name: [size, digest]}`` of the deployed files, or {} for a fresh target"""
+        try:
+            with open(self.root / self.manifest_name, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data.get('files', {}) if data.get('version') == 1 else {}
+
+    def path(self, name):
+        """Location of a deployed file; names may not point outside the target"""
+        parts = PurePosixPath(name).parts
+        if not parts or parts[0] == "/" or ".." in parts:
+            raise ValueError(f"Refusing to deploy outside {self.root}: {name!r}")
+        return self.root.joinpath(*parts)
+
+    def upload(self, name, path):
+        dest = self.path(name)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = dest.with_name(f".{dest.name}.{threading.get_ident()}.tmp")
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, dest)
+
+    def delete(self, name):
+        path = self.path(name)
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            return
+        # Drop directories the removal left empty
+        parent = path.parent
+        while parent != self.root:
+            try:
+                parent.rmdir()
+            except OSError:
+                break
+            parent = parent.parent
+
+    def write_manifest(self, files):
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / self.manifest_name
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'files': files}, f, sort_keys=True)
+        os.replace(tmp_path, path)
+
+
+class DeltaDeployer:
+    """Mirror a build onto a target by comparing manifests of path, size and hash
+
+    Only added and changed files are transferred and only files the previous
+    deploy placed are removed, so the cost follows the size of the change.
+    The target's manifest is replaced last: an interrupted deploy leaves the
+    old manifest, and the next deploy simply repeats the unfinished work.
+    """
+
+    def __init__(self, target, jobs=None):
+        self.target = target
+        self.jobs = jobs
+        self.counts = dict.fromkeys(('added', 'changed', 'removed', 'unchanged', 'bytes'), 0)
+
+    def deploy(self, files):
+        """Deploy ``files`` (name -> ``(path, size, digest)``); returns the counts"""
+        deployed = self.target.read_manifest()
+        wanted = {name: [size, digest] for name, (_, size, digest) in files.items()}
+        transfers = [name for name, entry in wanted.items() if deployed.get(name) != entry]
+        stale = sorted(set(deployed) - set(wanted), reverse=True)
+        for name in transfers:
+            self.counts['changed' if name in deployed else 'added'] += 1
+            self.counts['bytes'] += wanted[name][0]
+        self.counts['unchanged'] = len(wanted) - len(transfers)
+        self.counts['removed'] = len(stale)
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            list(pool.map(lambda name: self.target.upload(name, files[name][0]), transfers))
+        for name in stale:
+            self.target.delete(name)
+        self.target.write_manifest(wanted)
+        return self.counts
@@ -0,0 +1,392 @@
+"""Responsive image variants, packed sponsor logos and image header probing"""
+
+import os
+import base64
+import json
+import hashlib
+import io
+import struct
+import threading
+from pathlib import Path
+import re
+from .cache import write_if_changed
+
+
+# Pillow is optional; without it images are shipped exactly as they are
+try:
+    from PIL import Image, ImageOps, features as pil_features
+except ImportError:
+    Image = None
+
+
+class ResponsiveImages:
+    """Resized and re-encoded image variants, cached by source hash
+
+    Every source image is encoded once per digest into ``directory`` (one
+    file per width and format plus an ``index.json``) and reused by all
+    later builds. Without Pillow no variants are produced.
+    """
+
+    widths = (480, 960, 1440, 1920)
+
+    # Modern formats, best first: name -> (extension, MIME type, save options)
+    formats = {
+        'avif': ('avif', 'image/avif', {'quality': 60, 'speed': 8}),
+        'webp': ('webp', 'image/webp', {'quality': 80, 'method': 4}),
+    }
+
+    # Re-encoded originals used for the <img> fallback srcset
+    fallbacks = {
+        'JPEG': ('jpg', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+        'PNG': ('png', 'image/png', {}),
+    }
+
+    suffixes = ('.jpg', '.jpeg', '.png')
+
+    def __init__(self, directory, persist=True):
+        self.directory = Path(directory)
+        self.persist = persist
+        self.indexes = {}
+        self.locks = {}
+        self.lock = threading.Lock()
+
+    @property
+    def available(self):
+        return Image is not None
+
+    def supported_formats(self):
+        return [name for name in self.formats if pil_features.check(name)]
+
+    def variants(self, src, digest):
+        """Return the variants of ``src`` as dicts with width, ext, mime and source
+
+        ``source`` is the cached file, or the encoded bytes when the cache is
+        not persisted.
+        """
+        with self.lock:
+            lock = self.locks.setdefault(digest, threading.Lock())
+        with lock:
+            if digest not in self.indexes:
+                self.indexes[digest] = self.load_index(digest) or self.encode(src, digest)
+            return self.indexes[digest]
+
+    def load_index(self, digest):
+        index_path = self.directory / digest / "index.json"
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                variants = json.load(f)
+        except (OSError, ValueError):
+            return None
+        for variant in variants:
+            variant['source'] = index_path.parent / variant.pop('file')
+            if not variant['source'].exists():
+                return None
+        return variants
+
+    def encode(self, src, digest):
+        with Image.open(src) as opened:
+            original_format = opened.format
+            image = ImageOps.exif_transpose(opened)
+            image.load()
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('P', 'LA') else 'RGB')
+
+        widths = [w for w in self.widths if w < image.width] + [image.width]
+        resized = {
+            w: image if w == image.width else image.resize(
+                (w, max(1, round(image.height * w / image.width))), Image.LANCZOS)
+            for w in widths
+        }
+        targets = [(name.upper(), *self.formats[name]) for name in self.supported_formats()]
+        if original_format in self.fallbacks:
+            targets.append((original_format, *self.fallbacks[original_format]))
+
+        variants = []
+        for pil_format, ext, mime, options in targets:
+            for w in widths:
+                frame = resized[w]
+                if pil_format == 'JPEG' and frame.mode != 'RGB':
+                    frame = frame.convert('RGB')
+                buffer = io.BytesIO()
+                frame.save(buffer, pil_format, **options)
+                variants.append({'width': w, 'ext': ext, 'mime': mime, 'source': buffer.getvalue()})
+
+        if self.persist:
+            target_dir = self.directory / digest
+            target_dir.mkdir(parents=True, exist_ok=True)
+            index = []
+            for variant in variants:
+                filename = f"{variant['width']}.{variant['ext']}"
+                write_if_changed(target_dir / filename, variant['source'])
+                variant['source'] = target_dir / filename
+                index.append({**{k: v for k, v in variant.items() if k != 'source'}, 'file': filename})
+            write_if_changed(target_dir / "index.json", json.dumps(index).encode('utf-8'))
+        return variants
+
+
+class SponsorLogos:
+    """Sponsor logos normalised to one display box and packed into one request
+
+    Each logo is scaled to fit ``box`` (CSS pixels) at ``scale``x density.
+    Logos that encode to at most ``inline_limit`` bytes become data URIs and
+    the rest are stacked into a single sprite sheet addressed with CSS
+    background offsets. Results are cached by the digests of all logos.
+    """
+
+    box = (240, 120)
+    scale = 2
+    inline_limit = 6 * 1024
+    padding = 2
+    # Sheets wrap into another column past WebP's dimension limit
+    max_sheet_size = 16383
+
+    def __init__(self, directory, persist=True):
+        self.directory = Path(directory)
+        self.persist = persist
+        self.packs = {}
+        self.lock = threading.Lock()
+
+    def encoding(self):
+        """Return (PIL format, extension, MIME type, save options) for packed logos"""
+        if pil_features.check('webp'):
+            return 'WEBP', 'webp', 'image/webp', {'quality': 90, 'method': 4}
+        return 'PNG', 'png', 'image/png', {'optimize': True}
+
+    def cache_key(self, logos):
+        payload = json.dumps([self.box, self.scale, self.inline_limit, self.encoding()[0],
+                              [digest for _, digest in logos]])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def pack(self, logos):
+        """Pack ``(path, digest)`` pairs; returns the sheet and per-logo placement
+
+        The result has ``sheet`` (cached path, bytes or None), ``ext``,
+        ``size`` and ``items``, a list aligned with ``logos`` whose entries
+        hold either an ``inline`` data URI or sprite ``x``/``y`` offsets,
+        plus the display ``width``/``height`` in CSS pixels.
+        """
+        key = self.cache_key(logos)
+        with self.lock:
+            if key not in self.packs:
+                self.packs[key] = self.load(key) or self.build(key, logos)
+            return self.packs[key]
+
+    def load(self, key):
+        index_path = self.directory / key / "index.json"
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                packed = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if packed['sheet'] is not None:
+            packed['sheet'] = index_path.parent / packed['sheet']
+            if not packed['sheet'].exists():
+                return None
+        return packed
+
+    def build(self, key, logos):
+        pil_format, ext, mime, options = self.encoding()
+        max_w, max_h = self.box[0] * self.scale, self.box[1] * self.scale
+
+        items, sprites = [], []
+        seen = {}
+        for path, digest in logos:
+            # Sponsors sharing a logo share its placement
+            if digest in seen:
+                items.append(seen[digest])
+                continue
+            with Image.open(path) as opened:
+                image = opened.convert('RGBA')
+            image.thumbnail((max_w, max_h), Image.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, pil_format, **options)
+            item = {
+                'width': round(image.width / self.scale),
+                'height': round(image.height / self.scale),
+            }
+            if buffer.tell() <= self.inline_limit:
+                item['inline'] = f"data:{mime};base64,{base64.b64encode(buffer.getvalue()).decode('ascii')}"
+            else:
+                sprites.append((item, image))
+            items.append(item)
+            seen[digest] = item
+
+        sheet = None
+        size = (0, 0)
+        if sprites:
+            x = y = column_width = 0
+            for item, image in sprites:
+                if y and y + image.height > self.max_sheet_size:
+                    x, y, column_width = x + column_width + self.padding, 0, 0
+                item.update(x=x, y=y, sprite_width=image.width, sprite_height=image.height)
+                y += image.height + self.padding
+                column_width = max(column_width, image.width)
+            size = (max(item['x'] + image.width for item, image in sprites),
+                    max(item['y'] + image.height for item, image in sprites))
+            canvas = Image.new('RGBA', size, (0, 0, 0, 0))
+            for item, image in sprites:
+                canvas.paste(image, (item['x'], item['y']))
+            buffer = io.BytesIO()
+            canvas.save(buffer, pil_format, **options)
+            sheet = buffer.getvalue()
+
+        packed = {'sheet': sheet, 'ext': ext, 'size': size, 'items': items}
+        if self.persist:
+            target_dir = self.directory / key
+            target_dir.mkdir(parents=True, exist_ok=True)
+            if sheet is not None:
+                write_if_changed(target_dir / f"sheet.{ext}", sheet)
+                packed['sheet'] = target_dir / f"sheet.{ext}"
+            index = dict(packed, sheet=packed['sheet'].name if sheet is not None else None)
+            write_if_changed(target_dir / "index.json", json.dumps(index).encode('utf-8'))
+        return packed
+
+
+class ImageDimensions:
+    """Intrinsic image sizes read from file headers, cached by file digest
+
+    Only the few bytes that hold the size are read, so probing works without
+    Pillow and never decodes pixels. PNG, GIF, JPEG (honouring the EXIF
+    orientation), WebP, AVIF and SVG are understood; other files have no
+    size. Sizes are kept in one JSON file keyed by digest.
+    """
+
+    VERSION = 1
+
+    # EXIF orientations that rotate the image by 90 degrees
+    ROTATED = {5, 6, 7, 8}
+
+    def __init__(self, path, persist=True):
+        self.path = Path(path)
+        self.persist = persist
+        self.sizes = None
+        self.dirty = False
+        self.lock = threading.Lock()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION:
+                return data['sizes']
+        except (OSError, ValueError, KeyError):
+            pass
+        return {}
+
+    def size(self, path, digest):
+        """Return ``(width, height)`` of an image, or None when it cannot be read"""
+        with self.lock:
+            if self.sizes is None:
+                self.sizes = self.load()
+            if digest in self.sizes:
+                size = self.sizes[digest]
+                return tuple(size) if size else None
+        try:
+            with open(path, 'rb') as f:
+                size = self.probe(f)
+        except (OSError, ValueError, struct.error):
+            size = None
+        with self.lock:
+            self.sizes[digest] = list(size) if size else None
+            self.dirty = True
+        return size
+
+    def save(self):
+        if not self.dirty or not self.persist:
+            return
+        with self.lock:
+            data = json.dumps({'version': self.VERSION, 'sizes': self.sizes}, sort_keys=True)
+            self.dirty = False
+        write_if_changed(self.path, data.encode('utf-8'))
+
+    @classmethod
+    def probe(cls, f):
+        head = f.read(32)
+        if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+            return struct.unpack('>II', head[16:24])
+        if head[:6] in (b'GIF87a', b'GIF89a'):
+            return struct.unpack('<HH', head[6:10])
+        if head.startswith(b'\xff\xd8'):
+            return cls.probe_jpeg(f)
+        if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+            return cls.probe_webp(head + f.read(8))
+        if head[4:8] == b'ftyp' and head[8:12] in (b'avif', b'avis'):
+            return cls.probe_avif(head + f.read(4096))
+        if head.lstrip().startswith((b'<?xml', b'<svg', b'<!--')):
+            return cls.probe_svg(head + f.read(4096))
+        return None
+
+    @classmethod
+    def probe_jpeg(cls, f):
+        """Walk the JPEG segments up to the first frame header, seeking past the rest"""
+        f.seek(2)
+        orientation = 1
+        while True:
+            marker = f.read(2)
+            while marker[:1] == b'\xff' and marker[1:] == b'\xff':
+                marker = marker[1:] + f.read(1)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return None
+            kind = marker[1]
+            if kind in (0xD8, 0x01) or 0xD0 <= kind <= 0xD7:
+                continue
+            (length,) = struct.unpack('>H', f.read(2))
+            if 0xC0 <= kind <= 0xCF and kind not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack('>xHH', f.read(5))
+                return (height, width) if orientation in cls.ROTATED else (width, height)
+            if kind == 0xE1:
+                segment = f.read(length - 2)
+                if segment.startswith(b'Exif\0\0'):
+                    orientation = cls.exif_orientation(segment[6:])
+                continue
+            f.seek(length - 2, os.SEEK_CUR)
+
+    @staticmethod
+    def exif_orientation(tiff):
+        order = '<' if tiff[:2] == b'II' else '>'
+        (offset,) = struct.unpack(order + 'I', tiff[4:8])
+        (count,) = struct.unpack(order + 'H', tiff[offset:offset + 2])
+        for i in range(count):
+            entry = tiff[offset + 2 + 12 * i:offset + 14 + 12 * i]
+            tag, _, _, value = struct.unpack(order + 'HHIH', entry[:10])
+            if tag == 0x0112:
+                return value
+        return 1
+
+    @staticmethod
+    def probe_webp(head):
+        chunk = head[12:16]
+        if chunk == b'VP8 ':
+            width, height = struct.unpack('<HH', head[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b'VP8L':
+            bits = int.from_bytes(head[21:25], 'little')
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b'VP8X':
+            return int.from_bytes(head[24:27], 'little') + 1, int.from_bytes(head[27:30], 'little') + 1
+        return None
+
+    @staticmethod
+    def probe_avif(head):
+        # The image spatial extents property holds the size
+        pos = head.find(b'ispe')
+        if pos == -1:
+            return None
+        return struct.unpack('>II', head[pos + 8:pos + 16])
+
+    @staticmethod
+    def probe_svg(head):
+        match = re.search(rb'<svg\b[^>]*>', head)
+        if match is None:
+            return None
+        tag = match.group(0).decode('utf-8', 'replace')
+        attrs = dict(re.findall(r'([\w:-]+)\s*=\s*["\']([^"\']*)["\']', tag))
+        number = r'\s*([\d.]+)\s*(?:px)?\s*$'
+        width = re.match(number, attrs.get('width', ''))
+        height = re.match(number, attrs.get('height', ''))
+        if width and height:
+            return round(float(width.group(1))), round(float(height.group(1)))
+        box = attrs.get('viewBox', '').replace(',', ' ').split()
+        if len(box) == 4:
+            return round(float(box[2])), round(float(box[3]))
+        return None
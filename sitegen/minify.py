@@ -0,0 +1,282 @@
+"""CSS, JavaScript and HTML minifiers"""
+
+import posixpath
+from functools import lru_cache
+from markupsafe import escape
+import re
+
+
+CSS_TOKENS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|(/\*.*?\*/)', re.S)
+
+
+def minify_css(css):
+    """Strip comments and redundant whitespace from a stylesheet
+
+    String literals are left untouched, and whitespace is only removed
+    around punctuation where it can never be significant.
+    """
+    strings = []
+
+    def protect(match):
+        if match.group(1) is None:
+            return ''
+        strings.append(match.group(1))
+        return f"\0{len(strings) - 1}\0"
+
+    css = CSS_TOKENS.sub(protect, css)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    css = css.replace(';}', '}').strip()
+    return re.sub(r'\0(\d+)\0', lambda m: strings[int(m.group(1))], css)
+
+
+CSS_URL = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+
+
+def rebase_css_urls(css, from_dir, to_dir):
+    """Rewrite relative ``url()`` references when a stylesheet moves directory"""
+    if from_dir == to_dir:
+        return css
+
+    def rebase(match):
+        quote, url = match.groups()
+        if url.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return match.group(0)
+        target = posixpath.normpath(posixpath.join(from_dir, url))
+        return f"url({quote}{posixpath.relpath(target, to_dir or '.')}{quote})"
+
+    return CSS_URL.sub(rebase, css)
+
+
+# Keywords after which a "/" starts a regular expression rather than a division
+JS_REGEX_KEYWORDS = frozenset({'return', 'typeof', 'case', 'in', 'of', 'delete', 'void', 'throw',
+                               'new', 'instanceof', 'yield', 'await', 'else', 'do'})
+
+
+def minify_js(js):
+    """Conservatively minify JavaScript
+
+    Comments and indentation are removed and blank lines dropped, while
+    line breaks are kept so automatic semicolon insertion is unaffected.
+    Strings, template literals and regular expressions are copied verbatim.
+    """
+    code, out = [], []
+    i, n = 0, len(js)
+    last = ''  # last significant character, used to tell regexes from division
+    word = ''  # identifier or keyword that ``last`` ends
+    in_word = False
+
+    def flush():
+        text = re.sub(r'[ \t]+', ' ', "".join(code))
+        out.append(re.sub(r' ?\n\s*', '\n', text))
+        code.clear()
+
+    while i < n:
+        c = js[i]
+        if c in '"\'`':
+            j = i + 1
+            while j < n and js[j] != c:
+                j += 2 if js[j] == '\\' else 1
+            flush()
+            out.append(js[i:j + 1])
+            i, last, word, in_word = j + 1, c, '', False
+        elif js.startswith('//', i):
+            i = js.find('\n', i)
+            i = n if i == -1 else i
+        elif js.startswith('/*', i):
+            end = js.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            code.append(' ')
+            in_word = False
+        elif c == '/' and (last == '' or last in '(,=:[!&|?{};+-*%<>~^' or word in JS_REGEX_KEYWORDS):
+            j, in_class = i + 1, False
+            while j < n and (in_class or js[j] != '/') and js[j] != '\n':
+                if js[j] == '\\':
+                    j += 1
+                elif js[j] == '[':
+                    in_class = True
+                elif js[j] == ']':
+                    in_class = False
+                j += 1
+            while j + 1 < n and js[j + 1].isalpha():
+                j += 1
+            flush()
+            out.append(js[i:j + 1])
+            i, last, word, in_word = j + 1, '/', '', False
+        else:
+            code.append(c)
+            identifier = c.isalnum() or c in '_$'
+            if identifier:
+                word = word + c if in_word else c
+            elif not c.isspace():
+                word = ''
+            in_word = identifier
+            if not c.isspace():
+                last = c
+            i += 1
+    flush()
+    return "".join(out).strip()
+
+
+class HtmlMinifier:
+    """Minify HTML incrementally as chunks of a render stream arrive
+
+    Whitespace runs are collapsed to a single space outside ``<pre>``,
+    ``<textarea>``, ``<script>`` and ``<style>``, comments are dropped
+    (except conditional comments), boolean attributes lose their value and
+    attribute quotes are removed where HTML allows it.
+    """
+
+    RAW_TAGS = ('pre', 'textarea', 'script', 'style')
+    BOOLEAN_ATTRIBUTES = {
+        'allowfullscreen', 'async', 'autofocus', 'autoplay', 'checked', 'controls', 'default',
+        'defer', 'disabled', 'formnovalidate', 'hidden', 'inert', 'ismap', 'itemscope', 'loop',
+        'multiple', 'muted', 'nomodule', 'novalidate', 'open', 'playsinline', 'readonly',
+        'required', 'reversed', 'selected',
+    }
+    TAG = re.compile(r'<(/?)([a-zA-Z][\w:-]*)((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>')
+    ATTRIBUTE = re.compile(r'([^\s=/>]+)(?:\s*=\s*("[^"]*"|\'[^\']*\'|[^\s>]+))?')
+    UNQUOTED_VALUE = re.compile(r'[^\s"\'=<>`/]+')
+    WHITESPACE = re.compile(r'\s+')
+    batch_size = 8192
+
+    def __init__(self):
+        self.buffer = ""
+        self.raw_tag = None
+        self.raw_end = None
+        self.pending_space = False
+
+    def minify_stream(self, chunks):
+        """Yield minified HTML for an iterable of rendered chunks"""
+        for chunk in chunks:
+            output = self.feed(chunk)
+            if output:
+                yield output
+        yield self.close()
+
+    def feed(self, chunk):
+        """Consume a chunk and return whatever can already be emitted
+
+        Chunks are batched up to ``batch_size`` characters, since Jinja
+        yields many tiny chunks and scanning each one alone is slow.
+        """
+        # Jinja yields Markup chunks, which would escape the buffer when concatenated
+        self.buffer += str(chunk)
+        if len(self.buffer) < self.batch_size:
+            return ""
+        return self.drain()
+
+    def drain(self):
+        """Minify the buffered input up to the last incomplete token"""
+        buffer = self.buffer
+        pos = 0
+        out = []
+        while pos < len(buffer):
+            if self.raw_tag is not None:
+                match = self.raw_end.search(buffer, pos)
+                if match is None:
+                    # Hold back enough to recognise a closing tag split across chunks
+                    cut = max(pos, len(buffer) - len(self.raw_tag) - 2)
+                    out.append(buffer[pos:cut])
+                    pos = cut
+                    break
+                out.append(buffer[pos:match.start()])
+                pos = match.start()
+                self.raw_tag = None
+                continue
+
+            start = buffer.find("<", pos)
+            if start < 0:
+                out.append(self.text(buffer[pos:]))
+                pos = len(buffer)
+                break
+            if start > pos:
+                out.append(self.text(buffer[pos:start]))
+                pos = start
+
+            if buffer.startswith("<!--", pos):
+                end = buffer.find("-->", pos + 4)
+                if end < 0:
+                    break
+                if buffer.startswith("<!--[if", pos):
+                    out.append(self.flush_space() + buffer[pos:end + 3])
+                pos = end + 3
+                continue
+            match = self.TAG.match(buffer, pos)
+            if match is None:
+                end = buffer.find(">", pos)
+                if end < 0:
+                    break  # The tag continues in the next chunk
+                # Not a tag we understand (doctype, stray "<"): copy it as-is
+                out.append(self.flush_space() + buffer[pos:end + 1])
+                pos = end + 1
+                continue
+            out.append(self.flush_space() + self.tag(*match.groups()))
+            pos = match.end()
+            if not match.group(1) and match.group(2).lower() in self.RAW_TAGS:
+                self.raw_tag = match.group(2).lower()
+                self.raw_end = re.compile(f"</{self.raw_tag}", re.IGNORECASE)
+        self.buffer = buffer[pos:]
+        return "".join(out)
+
+    def close(self):
+        """Return the remaining output once the stream has ended"""
+        out = self.drain()
+        rest = self.buffer if self.raw_tag is not None else self.text(self.buffer)
+        self.buffer = ""
+        return out + rest + self.flush_space()
+
+    def text(self, text):
+        """Collapse whitespace in text, carrying a trailing space over to the next token"""
+        collapsed = self.WHITESPACE.sub(' ', text)
+        if not collapsed:
+            return ""
+        if collapsed == " ":
+            self.pending_space = True
+            return ""
+        leading = self.flush_space() if not collapsed.startswith(" ") else ""
+        self.pending_space = collapsed.endswith(" ")
+        return leading + collapsed.rstrip(" ") if self.pending_space else leading + collapsed
+
+    def flush_space(self):
+        space = " " if self.pending_space else ""
+        self.pending_space = False
+        return space
+
+    @classmethod
+    @lru_cache(maxsize=4096)
+    def tag(cls, closing, name, attributes):
+        """Rewrite a tag with minimal attribute syntax; pages repeat most tags, so results are cached"""
+        if closing:
+            return f"</{name}>"
+        parts = [name]
+        for attr, value in cls.ATTRIBUTE.findall(attributes):
+            if value[:1] in ('"', "'"):
+                value = value[1:-1]
+                quoted = True
+            else:
+                quoted = False
+            if attr.lower() in cls.BOOLEAN_ATTRIBUTES and value.lower() in ("", attr.lower()):
+                parts.append(attr)
+            elif not value and not quoted:
+                parts.append(attr)
+            elif cls.UNQUOTED_VALUE.fullmatch(value):
+                parts.append(f"{attr}={value}")
+            elif '"' in value:
+                parts.append(f"{attr}='{value}'")
+            else:
+                parts.append(f'{attr}="{value}"')
+        return f"<{' '.join(parts)}>"
+
+
+def html_attributes(attrs):
+    """Render a dict as escaped HTML attributes; ``class_`` becomes ``class``"""
+    parts = []
+    for name, value in attrs.items():
+        name = name.rstrip('_').replace('_', '-')
+        if value is True:
+            parts.append(name)
+        elif value is not None and value is not False:
+            parts.append(f'{name}="{escape(value)}"')
+    return " ".join(parts)
@@ -0,0 +1,134 @@
+"""Schedule extraction from the program PDF"""
+
+import json
+import logging
+import unicodedata
+from pathlib import Path
+import re
+from .cache import write_if_changed
+
+
+# pypdf is optional; without it the program is only offered as a PDF download
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+
+class ProgramExtractor:
+    """Schedule (days, sessions, times, speakers) read from the program PDF
+
+    Extraction works on the PDF's text: a line starting with a time
+    (``09:30``, ``9.30-10.15``) opens a session, weekday or "Day N" lines
+    open a day, and the lines that follow a session are its speakers
+    (``Speakers: A, B``, or a short line of names) or its details. Results
+    are cached as JSON by the PDF's digest, so a PDF is only parsed when it
+    changes. A PDF whose first ``probe_pages`` pages hold no session time
+    is taken not to be a schedule and is not read further. Without pypdf
+    nothing is extracted.
+    """
+
+    # Bump when the extraction rules change, so cached results are redone
+    VERSION = 1
+
+    probe_pages = 2
+
+    TIME = r'\d{1,2}[:.]\d{2}'
+    SESSION = re.compile(rf'^({TIME})(?:\s*[-\u2013\u2014]+\s*({TIME}))?\s+(.+)$')
+    DAY = re.compile(r'^(?:(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b|day\s+\d+\b)',
+                     re.IGNORECASE)
+    LABEL = re.compile(r'^(speakers?|chairs?|moderators?|panel(?:ists)?)\s*:\s*(.*)$', re.IGNORECASE)
+    NAME_SEPARATOR = re.compile(r'\s*(?:,|;|\band\b|&)\s*')
+
+    def __init__(self, directory, persist=True):
+        self.directory = Path(directory)
+        self.persist = persist
+        self.memory = {}
+
+    @property
+    def available(self):
+        return PdfReader is not None
+
+    def extract(self, path, digest):
+        """Return ``{'days': [...]}`` for a PDF, from the cache when possible"""
+        key = f"{digest}-v{self.VERSION}"
+        if key in self.memory:
+            return self.memory[key]
+        cache_path = self.directory / f"{key}.json"
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                schedule = json.load(f)
+        except (OSError, ValueError):
+            schedule = self.parse(self.read_lines(path))
+            if self.persist:
+                write_if_changed(cache_path, json.dumps(schedule, ensure_ascii=False).encode('utf-8'))
+        self.memory[key] = schedule
+        return schedule
+
+    def read_lines(self, path):
+        # pypdf warns about every font it cannot fully decode; text extraction copes
+        logger = logging.getLogger("pypdf")
+        level = logger.level
+        logger.setLevel(logging.ERROR)
+        try:
+            reader = PdfReader(str(path))
+            lines = []
+            for number, page in enumerate(reader.pages):
+                if number == self.probe_pages and not any(self.SESSION.match(line) for line in lines):
+                    break
+                text = unicodedata.normalize('NFKC', page.extract_text() or "")
+                lines.extend(line for line in (re.sub(r'\s+', ' ', line).strip()
+                                               for line in text.splitlines()) if line)
+            return lines
+        finally:
+            logger.setLevel(level)
+
+    @classmethod
+    def looks_like_names(cls, line):
+        """Short lines of capitalised words (optionally with affiliations in brackets)"""
+        words = re.sub(r'\([^)]*\)', '', line).split()
+        if not words or len(words) > 12 or line.endswith('.'):
+            return False
+        names = [word for word in words if word.lower() not in ('and', '&')]
+        return all(word[0].isupper() for word in names if word[0].isalpha())
+
+    def parse(self, lines):
+        days = []
+        sessions = []
+        session = None
+        for line in lines:
+            match = self.SESSION.match(line)
+            if self.DAY.match(line) and not match:
+                days.append({'title': line, 'sessions': []})
+                session = None
+                continue
+            if match:
+                start, end, title = match.groups()
+                session = {
+                    'id': f"session-{len(sessions) + 1}",
+                    'time': f"{start.replace('.', ':')}\u2013{end.replace('.', ':')}" if end else start.replace('.', ':'),
+                    'title': title,
+                    'speakers': [],
+                    'details': [],
+                }
+                if not days:
+                    days.append({'title': "", 'sessions': []})
+                days[-1]['sessions'].append(session)
+                sessions.append(session)
+                continue
+            if session is None:
+                continue
+            label = self.LABEL.match(line)
+            if label:
+                names = label.group(2)
+                if label.group(1).lower().startswith(('chair', 'moderator')):
+                    session['chair'] = names
+                else:
+                    session['speakers'].extend(n for n in self.NAME_SEPARATOR.split(names) if n)
+            elif not session['speakers'] and not session['details'] and self.looks_like_names(line):
+                session['speakers'].extend(n for n in self.NAME_SEPARATOR.split(line) if n)
+            else:
+                session['details'].append(line)
+        for session in sessions:
+            session['details'] = " ".join(session['details'])
+        return {'days': [day for day in days if day['sessions']]}
@@ -0,0 +1,233 @@
+"""Unused-selector purging and the page outline used for critical CSS"""
+
+import urllib.parse
+from fnmatch import fnmatchcase
+from html.parser import HTMLParser
+import re
+
+
+CSS_PSEUDO = re.compile(r'(?<!\\)::?[\w-]+(?:\((?:[^()]|\([^()]*\))*\))?')
+
+
+CSS_ATTRIBUTE_SELECTOR = re.compile(r'\[\s*([\w-]+)[^\]]*\]')
+
+
+CSS_NESTED_AT_RULES = ('@media', '@supports', '@layer', '@container', '@document')
+
+
+def css_blocks(css):
+    """Split a stylesheet into ``(prelude, body)`` pairs; body is None for statements"""
+    blocks = []
+    depth = 0
+    start = body_start = 0
+    prelude = ""
+    i = 0
+    while i < len(css):
+        char = css[i]
+        if char in "\"'":
+            # Skip strings so braces inside them are not counted
+            end = i + 1
+            while end < len(css) and css[end] != char:
+                end += 2 if css[end] == "\\" else 1
+            i = end + 1
+            continue
+        if css.startswith("/*", i):
+            end = css.find("*/", i + 2)
+            i = len(css) if end < 0 else end + 2
+            continue
+        if char == "{":
+            if depth == 0:
+                prelude = css[start:i]
+                body_start = i + 1
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                blocks.append((prelude, css[body_start:i]))
+                start = i + 1
+        elif char == ";" and depth == 0:
+            blocks.append((css[start:i], None))
+            start = i + 1
+        i += 1
+    clean = [(re.sub(r'/\*.*?\*/', '', prelude, flags=re.S).strip(), body) for prelude, body in blocks]
+    return [(prelude, body) for prelude, body in clean if prelude or body is not None]
+
+
+class SelectorUsage(HTMLParser):
+    """Tags, classes, ids and attribute names found in rendered HTML and scripts"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tags = set()
+        self.classes = set()
+        self.ids = set()
+        self.attributes = set()
+
+    def handle_starttag(self, tag, attrs):
+        self.tags.add(tag)
+        for name, value in attrs:
+            self.attributes.add(name)
+            if name == 'class' and value:
+                self.classes.update(value.split())
+            elif name == 'id' and value:
+                self.ids.add(value)
+
+    def add_script(self, text):
+        """Treat every word of a script as a possible tag, class, id or attribute
+
+        Scripts build elements and toggle classes at runtime, so anything
+        that looks like a name has to be considered in use.
+        """
+        words = set(re.findall(r'[A-Za-z_][\w-]*', text))
+        self.tags.update(word.lower() for word in words)
+        self.classes |= words
+        self.ids |= words
+        self.attributes |= words
+
+    def matches(self, selector, safelist=()):
+        """Check whether every tag, class, id and attribute in a selector is in use"""
+        def used(name, found):
+            return name in found or any(fnmatchcase(name, pattern) for pattern in safelist)
+
+        names = CSS_ATTRIBUTE_SELECTOR.findall(selector)
+        if not all(used(name, self.attributes) for name in names):
+            return False
+        # Pseudo-classes such as :not(.show) do not require their arguments
+        selector = CSS_PSEUDO.sub('', CSS_ATTRIBUTE_SELECTOR.sub('', selector))
+        unescape = lambda name: re.sub(r'\\(.)', r'\1', name)
+        classes = [unescape(name) for name in re.findall(r'\.((?:\\.|[\w-])+)', selector)]
+        ids = [unescape(name) for name in re.findall(r'#((?:\\.|[\w-])+)', selector)]
+        tags = [name.lower() for name in re.findall(r'(?:^|[\s>+~])([a-zA-Z][\w-]*)', selector)]
+        return (all(used(name, self.classes) for name in classes)
+                and all(used(name, self.ids) for name in ids)
+                and all(used(name, self.tags) for name in tags))
+
+
+def purge_css(css, usage, safelist=()):
+    """Drop style rules whose selectors match nothing in ``usage``
+
+    ``@keyframes`` and ``@font-face`` rules are kept only while a remaining
+    rule refers to them; ``/*! ... */`` licence comments are preserved.
+    """
+    deferred = []
+
+    def purge(text):
+        out = []
+        for prelude, body in css_blocks(text):
+            lowered = prelude.lower()
+            if body is None:
+                out.append(f"{prelude};")
+            elif lowered.startswith(CSS_NESTED_AT_RULES):
+                inner = purge(body)
+                if inner:
+                    out.append(f"{prelude}{{{inner}}}")
+            elif lowered.startswith(('@keyframes', '@-webkit-keyframes', '@font-face')):
+                if lowered.startswith('@font-face'):
+                    family = re.search(r'font-family\s*:\s*([^;}]+)', body)
+                    name = family.group(1).strip().strip('"\'') if family else None
+                else:
+                    name = prelude.split(None, 1)[1].strip() if ' ' in prelude else None
+                out.append(f"\0{len(deferred)}\0")
+                deferred.append((name, f"{prelude}{{{body}}}"))
+            elif prelude.startswith('@'):
+                out.append(f"{prelude}{{{body}}}")
+            else:
+                # Split the selector list on commas outside of parentheses
+                selectors = [sel.strip() for sel in re.split(r',(?![^()]*\))', prelude)]
+                selectors = [sel for sel in selectors if usage.matches(sel, safelist)]
+                if selectors:
+                    out.append(f"{','.join(selectors)}{{{body}}}")
+        return "".join(out)
+
+    purged = purge(css)
+    referenced = re.sub(r'\0\d+\0', '', purged)
+    purged = re.sub(r'\0(\d+)\0',
+                    lambda m: deferred[int(m.group(1))][1]
+                    if deferred[int(m.group(1))][0] and deferred[int(m.group(1))][0] in referenced else "",
+                    purged)
+    licences = "".join(re.findall(r'/\*!.*?\*/', css, flags=re.S))
+    return licences + purged
+
+
+class PageOutline(HTMLParser):
+    """Locate what the critical-path optimizer rewrites in a rendered page
+
+    Records the head's stylesheet links, where the above-the-fold content
+    ends (after ``fold_sections`` top-level ``<section>`` elements), the
+    first image shown there, every image in the body and the origins of
+    external resources.
+    """
+
+    def __init__(self, fold_sections=1):
+        super().__init__(convert_charrefs=True)
+        self.fold_sections = fold_sections
+        self.line_offsets = [0]
+        self.in_head = self.in_body = self.in_nav = False
+        self.head_insert = None
+        self.stylesheets = []
+        self.fold_end = None
+        self.section_depth = self.sections_closed = 0
+        self.picture = None
+        self.hero = None
+        self.images = []
+        self.origins = {}
+
+    def feed(self, data):
+        self.line_offsets = [0] + [m.end() for m in re.finditer("\n", data)]
+        super().feed(data)
+
+    def position(self):
+        line, column = self.getpos()
+        return self.line_offsets[line - 1] + column
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        start = self.position()
+        above_fold = self.fold_end is None
+        if tag == 'head':
+            self.in_head = True
+        elif tag == 'body':
+            self.in_body = True
+        elif tag == 'nav':
+            self.in_nav = True
+
+        if self.in_head and tag in ('link', 'style', 'script') and self.head_insert is None:
+            self.head_insert = start
+        if self.in_head and tag == 'link' and 'stylesheet' in (attrs.get('rel') or '').split():
+            self.stylesheets.append((start, start + len(self.get_starttag_text()), attrs))
+
+        # Images below the fold do not justify an early connection
+        url = attrs.get('href') if tag == 'link' else attrs.get('src') if tag in ('script', 'img') else None
+        if url and url.startswith(('http://', 'https://', '//')) and (tag != 'img' or above_fold):
+            parts = urllib.parse.urlsplit(url)
+            origin = f"{parts.scheme + ':' if parts.scheme else ''}//{parts.netloc}"
+            self.origins[origin] = self.origins.get(origin, False) or 'crossorigin' in attrs
+
+        if self.in_body and tag == 'img':
+            self.images.append({'start': start, 'end': start + len(self.get_starttag_text()),
+                                'attrs': attrs, 'above_fold': above_fold})
+
+        if self.in_body and above_fold:
+            if tag == 'section':
+                self.section_depth += 1
+            elif tag == 'picture':
+                self.picture = []
+            elif tag == 'source' and self.picture is not None:
+                self.picture.append(attrs)
+            elif (tag == 'img' and self.hero is None and not self.in_nav
+                  and not (attrs.get('src') or '').startswith('data:')):
+                self.hero = {'img': attrs, 'sources': self.picture or [], 'start': start}
+
+    def handle_endtag(self, tag):
+        if tag == 'head':
+            self.in_head = False
+        elif tag == 'nav':
+            self.in_nav = False
+        elif tag == 'picture':
+            self.picture = None
+        elif tag == 'section' and self.in_body and self.fold_end is None:
+            self.section_depth -= 1
+            if self.section_depth == 0:
+                self.sections_closed += 1
+                if self.sections_closed >= self.fold_sections:
+                    self.fold_end = self.rawdata.find('>', self.position()) + 1
@@ -0,0 +1,115 @@
+"""Text folding, slugs and the prebuilt client-side search index"""
+
+import json
+import hashlib
+import unicodedata
+import re
+
+
+# Letters that Unicode does not decompose into a base letter plus accent
+FOLD_LETTERS = {"ł": "l", "Ł": "L", "ø": "o", "Ø": "O", "ß": "ss", "æ": "ae", "Æ": "AE",
+                "œ": "oe", "Œ": "OE", "đ": "d", "Đ": "D", "ð": "d", "þ": "th", "ı": "i"}
+
+
+FOLD_TABLE = str.maketrans(FOLD_LETTERS)
+
+
+SEARCH_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def fold_text(text):
+    """Lowercase ASCII form of ``text``; accents are folded (Gergő -> gergo, Łukasz -> lukasz)"""
+    folded = unicodedata.normalize('NFKD', str(text).translate(FOLD_TABLE))
+    return folded.encode('ascii', 'ignore').decode('ascii').lower()
+
+
+def slugify(text):
+    """Lowercase ASCII slug for URLs, with accents folded"""
+    return re.sub(r'[^a-z0-9]+', '-', fold_text(text)).strip('-') or 'item'
+
+
+def search_tokens(text):
+    """Split text into the accent-folded terms the search index stores"""
+    return SEARCH_TOKEN.findall(fold_text(text))
+
+
+def unique_slugs(names):
+    """Slugify names in order, suffixing repeats with -2, -3, ..."""
+    used = set()
+    slugs = []
+    for name in names:
+        base = slug = slugify(name)
+        counter = 2
+        while slug in used:
+            slug = f"{base}-{counter}"
+            counter += 1
+        used.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+class SearchIndex:
+    """Inverted index of names and titles for the client-side search script
+
+    Documents are numbered in the order they are added, so every posting
+    list comes out sorted and the index is built in one linear pass. Terms
+    are sharded by their first characters, postings are delta-encoded, and
+    every file except ``index.json`` is named after its content hash so the
+    client only downloads the shards a query touches, once.
+    """
+
+    VERSION = 1
+
+    # Documents per docs file, and the index size from which shards use two-letter prefixes
+    docs_per_file = 1000
+    wide_shards_from = 5000
+
+    def __init__(self):
+        self.docs = []
+        self.postings = {}
+
+    def add(self, kind, title, url, detail="", extra=()):
+        """Index a document under the terms of its title and any ``extra`` text"""
+        doc_id = len(self.docs)
+        self.docs.append([kind, title, url, detail])
+        for text in (title, *extra):
+            for term in search_tokens(text):
+                ids = self.postings.setdefault(term, [])
+                if not ids or ids[-1] != doc_id:
+                    ids.append(doc_id)
+
+    @staticmethod
+    def encode(data):
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+
+    def files(self):
+        """Return the index as ``{file name: bytes}``, relative to its directory"""
+        prefix = 2 if len(self.docs) >= self.wide_shards_from else 1
+        shards = {}
+        for term, ids in self.postings.items():
+            shards.setdefault(term[:prefix], []).append(term)
+
+        files = {}
+
+        def add_file(stem, data):
+            payload = self.encode(data)
+            name = f"{stem}.{hashlib.sha256(payload).hexdigest()[:10]}.json"
+            files[name] = payload
+            return name
+
+        shard_files = {}
+        for key, terms in sorted(shards.items()):
+            terms.sort()
+            postings = [[ids[0]] + [b - a for a, b in zip(ids, ids[1:])]
+                        for ids in (self.postings[term] for term in terms)]
+            shard_files[key] = add_file(f"terms-{key}", {'terms': terms, 'postings': postings})
+        doc_files = [add_file(f"docs-{start // self.docs_per_file}",
+                              self.docs[start:start + self.docs_per_file])
+                     for start in range(0, len(self.docs), self.docs_per_file)]
+        files["index.json"] = self.encode({
+            'version': self.VERSION, 'count': len(self.docs), 'prefix': prefix,
+            'docs_per_file': self.docs_per_file, 'docs': doc_files, 'shards': shard_files,
+            # The client folds queries with the same table
+            'fold': FOLD_LETTERS,
+        })
+        return files
@@ -0,0 +1,238 @@
+"""Development server: in-memory output, live reload and the request handler"""
+
+import os
+import http.server
+import io
+import urllib.parse
+import threading
+from pathlib import Path
+from .assets import brotli, compress_bytes
+
+
+class MemoryOutput:
+    """In-memory stand-in for the output directory
+
+    Maps output names to rendered bytes, or to the source path of assets that
+    are served as-is. Builds write into a pending copy which replaces the
+    live map in a single assignment, so readers never see a half-built site.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.pending = None
+
+    def begin(self, clean=True):
+        """Start a build, either from scratch or on top of the current files"""
+        self.pending = {} if clean else dict(self.files)
+
+    def write(self, output_name, data):
+        self.pending[output_name] = data
+
+    def link(self, output_name, source):
+        self.pending[output_name] = Path(source)
+
+    def remove(self, output_name):
+        self.pending.pop(output_name, None)
+
+    def commit(self):
+        """Swap the finished build in"""
+        self.files, self.pending = self.pending, None
+
+    def get(self, output_name):
+        return self.files.get(output_name)
+
+    def read(self, output_name):
+        """Return the bytes of a file in the build in progress"""
+        data = self.pending.get(output_name)
+        return data.read_bytes() if isinstance(data, Path) else data
+
+
+class LiveReload:
+    """Broadcasts rebuild notifications to connected browsers"""
+
+    def __init__(self):
+        self.generation = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        """Tell every waiting browser that a rebuild finished"""
+        with self.condition:
+            self.generation += 1
+            self.condition.notify_all()
+
+    def wait(self, generation, timeout):
+        """Block until the generation moves past ``generation`` or the timeout expires"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.generation != generation, timeout)
+            return self.generation
+
+
+class DevRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Keep-alive request handler that serves the output directory with live reload
+
+    HTML responses get a small script that listens on ``EVENTS_PATH`` for
+    server-sent events and reloads the page when a rebuild finishes. When a
+    ``MemoryOutput`` is given, files are served from it instead of the disk.
+    """
+
+    protocol_version = "HTTP/1.1"
+    EVENTS_PATH = "/__livereload"
+    RELOAD_SCRIPT = (b'<script>new EventSource("/__livereload").onmessage = '
+                     b'function () { location.reload(); };</script>')
+    KEEPALIVE_SECONDS = 15
+
+    def __init__(self, *args, livereload=None, memory=None, **kwargs):
+        self.livereload = livereload
+        self.memory = memory
+        super().__init__(*args, **kwargs)
+
+    # Precompressed variants, most preferred first: Content-Encoding -> file suffix
+    ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+    def end_headers(self):
+        # Never let the browser serve a stale page from its cache during development
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        super().end_headers()
+
+    def negotiate_encoding(self, available):
+        """Pick the preferred encoding the client accepts for which ``available(suffix)`` holds"""
+        accepted = set()
+        for item in self.headers.get("Accept-Encoding", "").split(","):
+            coding, _, params = item.partition(";")
+            quality = params.strip()
+            if quality.startswith("q="):
+                try:
+                    if float(quality[2:]) == 0:
+                        continue
+                except ValueError:
+                    continue
+            accepted.add(coding.strip().lower())
+        for encoding, suffix in self.ENCODINGS:
+            if (encoding in accepted or "*" in accepted) and available(encoding, suffix):
+                return encoding, suffix
+        return None
+
+    def do_GET(self):
+        if self.livereload is not None and self.path.split("?", 1)[0] == self.EVENTS_PATH:
+            self.stream_events()
+        else:
+            super().do_GET()
+
+    def send_head(self):
+        if self.memory is not None:
+            return self.send_memory_head()
+
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and self.path.split("?", 1)[0].endswith("/"):
+            path = os.path.join(path, "index.html")
+        if not os.path.isfile(path):
+            return super().send_head()
+        if self.livereload is not None and path.endswith(".html"):
+            with open(path, 'rb') as f:
+                return self.send_html(f.read())
+
+        negotiated = self.negotiate_encoding(lambda encoding, suffix: os.path.isfile(path + suffix))
+        if negotiated is None:
+            return super().send_head()
+        encoding, suffix = negotiated
+        f = open(path + suffix, 'rb')
+        self.send_response(200)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+        self.end_headers()
+        return f
+
+    def send_memory_head(self):
+        """Serve a file from the in-memory output"""
+        name = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path).lstrip("/")
+        if name == "" or name.endswith("/"):
+            name += "index.html"
+        entry = self.memory.get(name)
+        if entry is None and self.memory.get(f"{name}/index.html") is not None:
+            self.send_response(301)
+            self.send_header("Location", f"/{name}/")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+        if entry is None:
+            self.send_error(404, "File not found")
+            return None
+
+        live_html = name.endswith(".html") and self.livereload is not None
+        negotiated = None if live_html else self.negotiate_encoding(
+            lambda encoding, suffix: self.memory.get(name + suffix) is not None)
+        if negotiated is not None:
+            encoding, suffix = negotiated
+            variant = self.memory.get(name + suffix)
+            body = variant.read_bytes() if isinstance(variant, Path) else variant
+            return self.send_body(body, self.guess_type(name), encoding)
+
+        if isinstance(entry, Path):
+            # Assets are read straight from their source files
+            try:
+                f = open(entry, 'rb')
+            except OSError:
+                self.send_error(404, "File not found")
+                return None
+            if not name.endswith(".html"):
+                self.send_response(200)
+                self.send_header("Content-Type", self.guess_type(name))
+                self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+                self.end_headers()
+                return f
+            with f:
+                entry = f.read()
+
+        if live_html:
+            return self.send_html(entry)
+        return self.send_body(entry, self.guess_type(name))
+
+    def send_html(self, body):
+        """Send an HTML page, adding the live-reload script when enabled
+
+        The script makes precompressed pages unusable, so the page is
+        compressed on the fly with the encoding the client prefers.
+        """
+        if self.livereload is not None:
+            index = body.lower().rfind(b"</body>")
+            if index == -1:
+                body += self.RELOAD_SCRIPT
+            else:
+                body = body[:index] + self.RELOAD_SCRIPT + body[index:]
+        negotiated = self.negotiate_encoding(
+            lambda encoding, suffix: encoding == "gzip" or brotli is not None)
+        if negotiated is not None:
+            encoding = negotiated[0]
+            return self.send_body(compress_bytes(body, encoding), "text/html; charset=utf-8", encoding)
+        return self.send_body(body, "text/html; charset=utf-8")
+
+    def send_body(self, body, content_type, encoding=None):
+        """Send headers for an in-memory body and return it as a file object"""
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        return io.BytesIO(body)
+
+    def stream_events(self):
+        """Hold the connection open and push a reload event after every rebuild"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        generation = self.livereload.generation
+        try:
+            while True:
+                current = self.livereload.wait(generation, self.KEEPALIVE_SECONDS)
+                if current != generation:
+                    generation = current
+                    self.wfile.write(b"data: reload\n\n")
+                else:
+                    self.wfile.write(b": keep-alive\n\n")
+                self.wfile.flush()
+        except OSError:
+            pass
+        self.close_connection = True
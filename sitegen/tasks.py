@@ -0,0 +1,182 @@
+"""The parallel build task graph and the build profiler"""
+
+import os
+import json
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+import sys
+
+
+# Peak memory is read from getrusage, which only exists on Unix
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class BuildProfiler:
+    """Per-phase wall time, CPU time, I/O and memory of a build
+
+    Phases are timed on the thread that runs them. CPU time and bytes
+    read/written (from ``/proc/thread-self/io`` where available) are
+    therefore per thread, and work a phase hands to other pools is not
+    counted. Peak memory is the process's peak RSS when the phase ended.
+    Results print as a table and export as Chrome trace events.
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.records = []
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def thread_io():
+        """Return ``(bytes read, bytes written, probe size)`` for the calling thread, or None
+
+        The probe's own read only shows up in the next probe, so callers
+        subtract its size from the difference.
+        """
+        try:
+            with open("/proc/thread-self/io", encoding="ascii") as f:
+                text = f.read()
+        except OSError:
+            return None
+        fields = dict(line.split(":", 1) for line in text.splitlines())
+        return int(fields["rchar"]), int(fields["wchar"]), len(text)
+
+    @staticmethod
+    def peak_rss():
+        """Peak resident set size of the process in bytes, or None"""
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    @contextmanager
+    def phase(self, name):
+        """Measure the enclosed block as one phase"""
+        io_before = self.thread_io()
+        cpu_before = time.thread_time()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - started
+            cpu = time.thread_time() - cpu_before
+            io_after = self.thread_io()
+            read = written = None
+            if io_before is not None and io_after is not None:
+                read = io_after[0] - io_before[0] - io_before[2]
+                written = io_after[1] - io_before[1]
+            record = {
+                'name': name,
+                'start': started - self.origin,
+                'wall': wall,
+                'cpu': cpu,
+                'read': read,
+                'written': written,
+                'peak_rss': self.peak_rss(),
+                'thread': threading.get_ident(),
+            }
+            with self.lock:
+                self.records.append(record)
+
+    def wrap(self, name, func):
+        """Return ``func`` measured as a phase called ``name``"""
+        def profiled(*args, **kwargs):
+            with self.phase(name):
+                return func(*args, **kwargs)
+        return profiled
+
+    def summary(self):
+        """Print one row per phase in start order"""
+        def kib(value):
+            return "-" if value is None else f"{value / 1024:.1f}"
+
+        rows = sorted(self.records, key=lambda record: record['start'])
+        width = max([len(record['name']) for record in rows] + [5])
+        print("📊 Build profile")
+        print(f"{'Phase':<{width}} {'Wall ms':>9} {'CPU ms':>9} {'Read KiB':>10} {'Written KiB':>12} {'Peak RSS MiB':>13}")
+        for record in rows:
+            peak = "-" if record['peak_rss'] is None else f"{record['peak_rss'] / 1024 ** 2:.1f}"
+            print(f"{record['name']:<{width}} {record['wall'] * 1000:>9.1f} {record['cpu'] * 1000:>9.1f} "
+                  f"{kib(record['read']):>10} {kib(record['written']):>12} {peak:>13}")
+
+    def write_trace(self, path):
+        """Write the phases as Chrome trace events (chrome://tracing, Perfetto)"""
+        pid = os.getpid()
+        threads = {}
+        events = []
+        for record in sorted(self.records, key=lambda record: record['start']):
+            tid = threads.setdefault(record['thread'], len(threads) + 1)
+            events.append({
+                'name': record['name'],
+                'cat': record['name'].split(":", 1)[0],
+                'ph': 'X',
+                'ts': round(record['start'] * 1e6),
+                'dur': round(record['wall'] * 1e6),
+                'pid': pid,
+                'tid': tid,
+                'args': {key: record[key] for key in ('cpu', 'read', 'written', 'peak_rss')},
+            })
+        for ident, tid in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                           'args': {'name': 'main' if ident == threading.main_thread().ident else f"worker {tid}"}})
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return path
+
+
+class TaskGraph:
+    """Dependency-ordered build steps executed on a thread pool
+
+    Each task starts as soon as all of its dependencies have finished and
+    receives their results as positional arguments. Results are keyed by
+    task name, so the build output does not depend on scheduling order.
+    """
+
+    def __init__(self, jobs=None, profiler=None):
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+        self.tasks = {}
+        self.profiler = profiler
+
+    def add(self, name, func, deps=()):
+        """Register a task; dependencies must already be registered"""
+        if name in self.tasks:
+            raise ValueError(f"Duplicate build task: {name}")
+        for dep in deps:
+            if dep not in self.tasks:
+                raise ValueError(f"Build task {name} depends on unknown task {dep}")
+        if self.profiler is not None:
+            func = self.profiler.wrap(name, func)
+        self.tasks[name] = (func, tuple(deps))
+        return name
+
+    def run(self):
+        """Execute every task and return a mapping of task name to result"""
+        results = {}
+        pending = dict(self.tasks)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            try:
+                while pending or running:
+                    # Submit in registration order so runs are reproducible
+                    for name, (func, deps) in list(pending.items()):
+                        if all(dep in results for dep in deps):
+                            del pending[name]
+                            future = pool.submit(func, *(results[dep] for dep in deps))
+                            running[future] = name
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        results[running.pop(future)] = future.result()
+            except BaseException:
+                for future in running:
+                    future.cancel()
+                raise
+        return results
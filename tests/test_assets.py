@@ -0,0 +1,109 @@
+import gzip
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sitegen.assets import AssetStore, AssetSync, Precompressor
+
+
+def same_file(a, b):
+    a, b = os.stat(a), os.stat(b)
+    return (a.st_dev, a.st_ino) == (b.st_dev, b.st_ino)
+
+
+def test_sync_hardlinks_and_skips_current_files(tmp_path):
+    src = tmp_path / "logo.svg"
+    src.write_text("<svg/>")
+    dest = tmp_path / "output" / "assets" / "logo.svg"
+
+    sync = AssetSync("hardlink")
+    assert sync.sync_file(src, dest)
+    assert same_file(src, dest)
+    assert not sync.sync_file(src, dest)
+    assert sync.counts["hardlink"] == 1 and sync.counts["skipped"] == 1
+
+
+def test_sync_falls_back_to_copy(tmp_path, monkeypatch):
+    def cross_device(src, dest):
+        raise OSError("Invalid cross-device link")
+
+    monkeypatch.setattr(os, "link", cross_device)
+    sources = []
+    for name in ("a.css", "b.css"):
+        sources.append(tmp_path / name)
+        sources[-1].write_text(f"/* {name} */")
+
+    sync = AssetSync("hardlink")
+    for src in sources:
+        assert sync.place(src, tmp_path / "output" / src.name) == "copy"
+        assert (tmp_path / "output" / src.name).read_bytes() == src.read_bytes()
+        assert not same_file(src, tmp_path / "output" / src.name)
+    # A failed method is not retried for every file
+    assert sync.unsupported == {"hardlink"}
+    assert sync.counts["copy"] == 2
+    assert not list((tmp_path / "output").glob(".*.tmp"))
+
+
+def test_sync_tree_prunes_removed_files(tmp_path):
+    src_dir, dest_dir = tmp_path / "assets", tmp_path / "output"
+    (src_dir / "js").mkdir(parents=True)
+    (src_dir / "js" / "main.js").write_text("main()")
+    (src_dir / "old.js").write_text("old()")
+
+    sync = AssetSync("copy")
+    sync.sync_tree(src_dir, dest_dir)
+    (src_dir / "old.js").unlink()
+    synced = sync.sync_tree(src_dir, dest_dir)
+    assert [rel for rel, _ in synced] == ["js/main.js"]
+    assert sorted(p.relative_to(dest_dir).as_posix() for p in dest_dir.rglob("*")) == ["js", "js/main.js"]
+
+
+def test_store_keeps_each_file_once(tmp_path):
+    store = AssetStore(tmp_path / "objects", mode="hardlink")
+    first = store.add_bytes(b"body{}")
+    assert store.add_bytes(b"body{}") == first
+    assert first == store.object_path(hashlib.sha256(b"body{}").hexdigest())
+    assert store.counts == {"stored": 1, "reused": 1}
+
+    # Build-cache files are linked in; other sources are copied so editing them cannot alter the object
+    cached, source = tmp_path / "cached.webp", tmp_path / "source.css"
+    cached.write_bytes(b"RIFF-webp")
+    source.write_bytes(b"a{}")
+    linked = store.add_file(cached, hashlib.sha256(b"RIFF-webp").hexdigest(), link=True)
+    cloned = store.add_file(source, hashlib.sha256(b"a{}").hexdigest())
+    assert same_file(cached, linked)
+    assert not same_file(source, cloned) and cloned.read_bytes() == b"a{}"
+
+
+def test_store_prune_keeps_linked_objects(tmp_path):
+    store = AssetStore(tmp_path / "objects", mode="hardlink")
+    sync = AssetSync("hardlink")
+    used = store.add_bytes(b"used")
+    unused = store.add_bytes(b"unused")
+    sync.sync_file(used, tmp_path / "output" / "used.txt")
+
+    assert store.prune() == (1, len(b"unused"))
+    assert used.exists() and not unused.exists()
+    assert same_file(used, tmp_path / "output" / "used.txt")
+
+
+def test_precompressor_identical_outputs_in_parallel(tmp_path):
+    # Outputs with the same bytes (style_1.css/style_old.css, one page in two
+    # editions) share a cache path and are compressed at the same time
+    precompressor = Precompressor(tmp_path / "compressed")
+    workers = 8
+    for round in range(25):
+        data = f"body {{ color: red; }} /* {round} */".encode() * 50
+        digest = hashlib.sha256(data).hexdigest()
+        barrier = threading.Barrier(workers)
+
+        def compress(_):
+            barrier.wait()
+            return precompressor.compress(lambda: data, digest, "gzip", ".gz")
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(compress, range(workers)))
+        assert all(result == results[0] for result in results)
+        assert gzip.decompress(results[0].read_bytes()) == data
+    assert not list((tmp_path / "compressed").glob(".*.tmp"))
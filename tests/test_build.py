@@ -0,0 +1,78 @@
+import importlib.util
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def site(tmp_path):
+    """A copy of the project with its own build.py, so outputs and caches stay in tmp_path"""
+    for name in ("config.yaml", "build.py"):
+        shutil.copy2(ROOT / name, tmp_path / name)
+    for name in ("templates", "content", "assets"):
+        shutil.copytree(ROOT / name, tmp_path / name)
+    spec = importlib.util.spec_from_file_location("site_build", tmp_path / "build.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    generator = module.StaticSiteGenerator(incremental=True)
+    generator.build()
+    return generator
+
+
+def bundles(generator, pattern):
+    return sorted(path.name for path in (generator.output_dir / "assets").rglob(pattern))
+
+
+def wait_for(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for the rebuild"
+        time.sleep(0.05)
+
+
+def test_watch_removes_superseded_bundle(site):
+    old = bundles(site, "style.*.css*")
+    assert len(old) >= 1
+
+    rebuilds = []
+    site.rebuild_listeners.append(lambda: rebuilds.append(True))
+    stop = threading.Event()
+    watcher = threading.Thread(target=site.watch, args=(stop,))
+    watcher.start()
+    try:
+        time.sleep(0.2)
+        stylesheet = site.assets_dir / "css" / "style.css"
+        stylesheet.write_text(stylesheet.read_text(encoding='utf-8') + "\n.watch-test { color: red; }\n",
+                              encoding='utf-8')
+        wait_for(lambda: rebuilds)
+    finally:
+        stop.set()
+        watcher.join()
+
+    new = bundles(site, "style.*.css*")
+    assert new and not set(old) & set(new)
+    assert not set(old) & {Path(name).name for name in site.manifest.outputs}
+
+
+def test_changed_bundle_leaves_one_fingerprint(site):
+    site.incremental = True
+    site.load_edition_content()
+    stylesheet = site.assets_dir / "css" / "style.css"
+    script = site.assets_dir / "js" / "search.js"
+    for round in range(2):
+        stylesheet.write_text(stylesheet.read_text(encoding='utf-8') + f"\n.round-{round} {{ color: red; }}\n",
+                              encoding='utf-8')
+        script.write_text(script.read_text(encoding='utf-8') + f"\nvar round{round} = {round};\n",
+                          encoding='utf-8')
+        site.rebuild_changed({stylesheet, script})
+        assert len(bundles(site, "style.*.css")) == 1
+        assert len(bundles(site, "main-bundle.*.js")) == 1
+        assert len(bundles(site, "style.*.css.gz")) == 1
+
+    site.build()
+    assert bundles(site, "style.*.css") == [Path(site.build_bundle(["assets/css/style.css"])).name]
@@ -0,0 +1,67 @@
+import os
+
+from sitegen.cache import BuildManifest, changed_keys
+
+
+def test_manifest_round_trip(tmp_path):
+    source = tmp_path / "page.html"
+    source.write_text("<p>hi</p>")
+    output = tmp_path / "out.html"
+    output.write_text("<p>hi</p>")
+
+    manifest = BuildManifest(tmp_path / "manifest.json")
+    inputs = {"templates/page.html": manifest.digest(source)}
+    manifest.record("out.html", output, inputs, content_keys={"symposium.site"})
+    manifest.save()
+
+    reloaded = BuildManifest(tmp_path / "manifest.json")
+    assert reloaded.is_fresh("out.html", output, inputs)
+    assert reloaded.outputs["out.html"]["content_keys"] == ["symposium.site"]
+    assert not reloaded.is_fresh("out.html", output, {"templates/page.html": "other"})
+
+
+def test_manifest_notices_edited_outputs_and_sources(tmp_path):
+    source = tmp_path / "hero.jpg"
+    source.write_bytes(b"one")
+    output = tmp_path / "index.html"
+    output.write_text("page")
+
+    manifest = BuildManifest(tmp_path / "manifest.json")
+    manifest.record("index.html", output, {}, discovered={str(source): manifest.digest(source)})
+    assert manifest.is_fresh("index.html", output, {})
+
+    source.write_bytes(b"two!")
+    assert not manifest.is_fresh("index.html", output, {})
+
+    manifest.record("index.html", output, {}, discovered={str(source): manifest.digest(source)})
+    output.write_text("edited by hand")
+    assert not manifest.is_fresh("index.html", output, {})
+
+
+def test_manifest_digest_reuses_unchanged_stat(tmp_path):
+    source = tmp_path / "a.txt"
+    source.write_text("same")
+    manifest = BuildManifest(tmp_path / "manifest.json")
+    digest = manifest.digest(source)
+    # A cached digest is trusted while size and mtime are unchanged
+    manifest.files[str(source)][2] = "cached"
+    assert manifest.digest(source) == "cached"
+    st = source.stat()
+    os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+    assert manifest.digest(source) == digest
+
+
+def test_stale_outputs(tmp_path):
+    manifest = BuildManifest(tmp_path / "manifest.json")
+    for name in ("a", "b", "c"):
+        manifest.record(name, None, {})
+    manifest.produced = set()
+    manifest.keep("b")
+    assert manifest.stale_outputs() == ["a", "c"]
+
+
+def test_changed_keys():
+    old = {"site": {"title": "A"}, "participants": [1]}
+    assert changed_keys("symposium", old, {"site": {"title": "B"}, "participants": [1]}) == {"symposium.site"}
+    assert changed_keys("symposium", old, {"site": {"title": "A"}}) == {"symposium.participants", "symposium.*"}
+    assert changed_keys("symposium", None, old) == {"symposium.*"}
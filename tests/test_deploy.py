@@ -0,0 +1,81 @@
+import hashlib
+import shutil
+import subprocess
+
+import pytest
+
+from sitegen.deploy import DeltaDeployer, DirectoryTarget, GitPagesDeployer
+
+
+def site_files(root, contents):
+    files = {}
+    for name, data in contents.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        files[name] = (path, len(data), hashlib.sha256(data).hexdigest())
+    return files
+
+
+def test_delta_deploy_transfers_only_changes(tmp_path):
+    target = DirectoryTarget(tmp_path / "site")
+    first = site_files(tmp_path / "v1", {"index.html": b"one", "assets/a.css": b"a", "old/x.js": b"x"})
+    counts = DeltaDeployer(target).deploy(first)
+    assert (counts["added"], counts["unchanged"]) == (3, 0)
+
+    second = site_files(tmp_path / "v2", {"index.html": b"two", "assets/a.css": b"a", "new.txt": b"n"})
+    counts = DeltaDeployer(target).deploy(second)
+    assert {k: counts[k] for k in ("added", "changed", "removed", "unchanged")} == \
+        {"added": 1, "changed": 1, "removed": 1, "unchanged": 1}
+    assert (tmp_path / "site" / "index.html").read_bytes() == b"two"
+    assert not (tmp_path / "site" / "old").exists()
+    assert set(target.read_manifest()) == set(second)
+
+    counts = DeltaDeployer(target).deploy(second)
+    assert counts["unchanged"] == 3 and counts["bytes"] == 0
+
+
+def test_directory_target_refuses_paths_outside(tmp_path):
+    target = DirectoryTarget(tmp_path)
+    for name in ("../escape", "/etc/passwd", ""):
+        with pytest.raises(ValueError):
+            target.path(name)
+
+
+def git(cwd, *args):
+    return subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, check=True).stdout.strip()
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+def test_git_pages_deploy_to_a_local_bare_repository(tmp_path):
+    remote = tmp_path / "site.git"
+    git(tmp_path, "init", "--quiet", "--bare", str(remote))
+    source = tmp_path / "source"
+    source.mkdir()
+    git(source, "init", "--quiet")
+    site = tmp_path / "output"
+    paths = {name: site / name for name in ("index.html", "assets/css/style.css", "assets/js/main.js")}
+    for name, path in paths.items():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"contents of {name}")
+
+    deployer = GitPagesDeployer(source, tmp_path / "deploy.json", remote=str(remote), branch="gh-pages")
+    first = deployer.deploy(paths, "Deploy site")
+    assert first == git(remote, "rev-parse", "refs/heads/gh-pages")
+    assert set(git(remote, "ls-tree", "-r", "--name-only", first).split()) == set(paths) | {".nojekyll"}
+    assert deployer.counts["hashed"] == 3
+
+    # Nothing changed: every blob and tree is reused and no commit is made
+    again = GitPagesDeployer(source, tmp_path / "deploy.json", remote=str(remote), branch="gh-pages")
+    assert again.deploy(paths, "Deploy site") is None
+    assert again.counts["hashed"] == 0 and again.counts["reused_blobs"] == 3
+    assert again.counts["trees"] == 0 and again.counts["reused_trees"] == deployer.counts["trees"]
+    assert git(remote, "rev-parse", "refs/heads/gh-pages") == first
+
+    # A change only rewrites the trees above it and fast-forwards the branch
+    paths["assets/js/main.js"].write_text("changed")
+    third = GitPagesDeployer(source, tmp_path / "deploy.json", remote=str(remote), branch="gh-pages")
+    commit = third.deploy(paths, "Deploy site")
+    assert third.counts["hashed"] == 1 and third.counts["reused_trees"] == 1
+    assert git(remote, "rev-parse", f"{commit}^") == first
+    assert git(remote, "show", f"{commit}:assets/js/main.js") == "changed"
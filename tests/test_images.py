@@ -0,0 +1,90 @@
+import io
+import struct
+
+import pytest
+
+from sitegen.images import ImageDimensions
+
+Image = pytest.importorskip("PIL.Image")
+ImageOps = pytest.importorskip("PIL.ImageOps")
+features = pytest.importorskip("PIL.features")
+
+# Odd sizes, so swapped or off-by-one dimensions show up
+WIDTH, HEIGHT = 37, 23
+
+
+def encode(fmt, mode="RGB", **options):
+    buffer = io.BytesIO()
+    Image.new(mode, (WIDTH, HEIGHT), "teal").save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def jpeg(orientation):
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    return encode("JPEG", exif=exif.tobytes())
+
+
+def jpeg_big_endian_exif(orientation):
+    # Pillow writes Intel byte order; cameras often use Motorola
+    tiff = b"MM\0\x2a" + struct.pack(">IH", 8, 1) + struct.pack(">HHIHH", 0x0112, 3, 1, orientation, 0)
+    app1 = b"Exif\0\0" + tiff + struct.pack(">I", 0)
+    data = encode("JPEG")
+    return data[:2] + b"\xff\xe1" + struct.pack(">H", len(app1) + 2) + app1 + data[2:]
+
+
+CASES = {
+    "png": lambda: encode("PNG"),
+    "png-palette": lambda: encode("PNG", mode="P"),
+    "gif": lambda: encode("GIF"),
+    "jpeg": lambda: encode("JPEG"),
+    "jpeg-progressive": lambda: encode("JPEG", progressive=True),
+    **{f"jpeg-orientation-{n}": (lambda n=n: jpeg(n)) for n in range(1, 9)},
+    "jpeg-big-endian-exif": lambda: jpeg_big_endian_exif(6),
+    "webp-lossy": lambda: encode("WEBP"),
+    "webp-lossless": lambda: encode("WEBP", lossless=True),
+    "webp-alpha": lambda: encode("WEBP", mode="RGBA"),
+    "avif": lambda: encode("AVIF"),
+}
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_probe_matches_pillow(name):
+    fmt = name.split("-")[0]
+    if fmt in ("webp", "avif") and not features.check(fmt):
+        pytest.skip(f"Pillow was built without {fmt} support")
+    data = CASES[name]()
+    expected = ImageOps.exif_transpose(Image.open(io.BytesIO(data))).size
+    assert ImageDimensions.probe(io.BytesIO(data)) == expected
+
+
+def test_rotated_orientations_swap_the_size():
+    for orientation in range(1, 9):
+        size = ImageDimensions.probe(io.BytesIO(jpeg(orientation)))
+        assert size == ((HEIGHT, WIDTH) if orientation in ImageDimensions.ROTATED else (WIDTH, HEIGHT))
+
+
+@pytest.mark.parametrize("svg, expected", [
+    (b'<svg xmlns="http://www.w3.org/2000/svg" width="120" height="40px"></svg>', (120, 40)),
+    (b'<?xml version="1.0"?>\n<svg viewBox="0 0 64.4 32"></svg>', (64, 32)),
+    (b'<svg width="100%" height="100%" viewBox="0,0,10,20"></svg>', (10, 20)),
+    (b'<svg width="100%"></svg>', None),
+])
+def test_probe_svg(svg, expected):
+    assert ImageDimensions.probe(io.BytesIO(svg)) == expected
+
+
+def test_sizes_are_cached_by_digest(tmp_path):
+    image = tmp_path / "hero.png"
+    image.write_bytes(encode("PNG"))
+    (tmp_path / "notes.txt").write_text("not an image")
+
+    dimensions = ImageDimensions(tmp_path / "dimensions.json")
+    assert dimensions.size(image, "digest") == (WIDTH, HEIGHT)
+    assert dimensions.size(tmp_path / "notes.txt", "text") is None
+    dimensions.save()
+
+    image.unlink()
+    reloaded = ImageDimensions(tmp_path / "dimensions.json")
+    assert reloaded.size(image, "digest") == (WIDTH, HEIGHT)
+    assert reloaded.size(tmp_path / "notes.txt", "text") is None
@@ -0,0 +1,74 @@
+import pytest
+
+from sitegen.minify import HtmlMinifier, minify_css, minify_js, rebase_css_urls
+
+
+def minify_html(html, chunk=None):
+    minifier = HtmlMinifier()
+    chunks = [html] if chunk is None else [html[i:i + chunk] for i in range(0, len(html), chunk)]
+    return "".join(minifier.minify_stream(chunks))
+
+
+def test_minify_css():
+    css = """
+    /* comment */
+    .a ,  .b > p {
+        color: red;
+        content: "  keep  /* this */ ";
+    }
+    """
+    assert minify_css(css) == '.a,.b>p{color:red;content:"  keep  /* this */ "}'
+
+
+def test_rebase_css_urls():
+    css = 'a{background:url("../img/a.png")}b{background:url(data:x)}c{background:url(/abs.png)}'
+    assert rebase_css_urls(css, "assets/vendor/css", "assets/css") == \
+        'a{background:url("../vendor/img/a.png")}b{background:url(data:x)}c{background:url(/abs.png)}'
+
+
+def test_minify_html():
+    html = """<!DOCTYPE html>
+    <!-- dropped -->
+    <div   class="card  body" id="x">
+        <input type="checkbox" checked="checked" value="a b">
+        <a href='say "hi"'>Link</a>
+    </div>
+    <pre>  keep
+      this  </pre>
+    """
+    assert minify_html(html) == (
+        '<!DOCTYPE html> <div class="card  body" id=x> <input type=checkbox checked value="a b"> '
+        "<a href='say \"hi\"'>Link</a> </div> <pre>  keep\n      this  </pre> "
+    )
+
+
+def test_minify_html_is_independent_of_chunking():
+    html = "<p class=\"a\">one   two</p>\n<script>if (a  <  b) { x(); }</script>\n<p>three</p>" * 50
+    HtmlMinifier.batch_size, saved = 1, HtmlMinifier.batch_size
+    try:
+        expected = minify_html(html)
+        for size in (1, 3, 7, 64):
+            assert minify_html(html, size) == expected
+    finally:
+        HtmlMinifier.batch_size = saved
+    assert "<script>if (a  <  b) { x(); }</script>" in expected
+
+
+@pytest.mark.parametrize("source, expected", [
+    # Regular expressions after keywords and operators are copied verbatim
+    ("function f(s) {\n    return /\\/\\//.test(s); // trailing\n}",
+     "function f(s) {\nreturn /\\/\\//.test(s);\n}"),
+    ("if (typeof /a b/ === 'object') throw /x\\/y/g", "if (typeof /a b/ === 'object') throw /x\\/y/g"),
+    ("x = s.replace(/[/]  +/g, ' ')", "x = s.replace(/[/]  +/g, ' ')"),
+    ("for (const m of/ab/.exec(s)) {}", "for (const m of/ab/.exec(s)) {}"),
+    # Division after identifiers, numbers and closing brackets
+    ("x = a / b / 2;\ny = (a + b) / c[0] / d", "x = a / b / 2;\ny = (a + b) / c[0] / d"),
+    ("ratio = returns / total", "ratio = returns / total"),
+    # Strings keep comment-like text and whitespace
+    ("url = 'http://example.org/  a' + \"/* no */\" + `// ${b}`",
+     "url = 'http://example.org/  a' + \"/* no */\" + `// ${b}`"),
+    # Comments, indentation and blank lines go; line breaks stay
+    ("/* header */\nvar a = 1;   // one\n\n\n    var b = 2;", "var a = 1;\nvar b = 2;"),
+])
+def test_minify_js(source, expected):
+    assert minify_js(source) == expected
@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from sitegen.program import ProgramExtractor
+
+
+def write_pdf(path, pages):
+    """Write a minimal PDF with one Helvetica text line per entry of each page"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    kids = []
+    for lines in pages:
+        text = " ".join("(" + line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") Tj T*"
+                        for line in lines)
+        stream = f"BT /F1 11 Tf 14 TL 50 780 Td {text} ET"
+        objects.append(f"<< /Length {len(stream.encode('cp1252'))} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Contents {len(objects)} 0 R /Resources << /Font << /F1 3 0 R >> >> >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("cp1252")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer << /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(bytes(out))
+
+
+SCHEDULE = [
+    "European Mobility Symposium - Program",
+    "Thursday, 21 November 2024",
+    "09:00 - 09:30 Registration and welcome coffee",
+    "09:30-10:30 Keynote: Human mobility at scale",
+    "Speakers: Luca Pappalardo, Marta C. González",
+    "10.30 – 11.00 Coffee break",
+    "11:00 - 12:30 Session 1: Urban mobility",
+    "Chair: Dino Pedreschi",
+    "Gianni Barlacchi and Bruno Lepri",
+    "Friday, 22 November 2024",
+    "09:30 - 11:00 Session 2: Mobility and health",
+    "Filippo Simini",
+    "Short talks on epidemics and mobility data.",
+    "12:00 Closing remarks",
+]
+
+
+def test_parse_days_sessions_and_speakers():
+    days = ProgramExtractor("unused", persist=False).parse(SCHEDULE)["days"]
+    assert [day["title"] for day in days] == ["Thursday, 21 November 2024", "Friday, 22 November 2024"]
+    sessions = [session for day in days for session in day["sessions"]]
+    assert [s["id"] for s in sessions] == [f"session-{n}" for n in range(1, 7)]
+    assert [s["time"] for s in sessions] == ["09:00–09:30", "09:30–10:30", "10:30–11:00",
+                                             "11:00–12:30", "09:30–11:00", "12:00"]
+    keynote, _, urban, health, closing = sessions[1], sessions[2], sessions[3], sessions[4], sessions[5]
+    assert keynote["title"] == "Keynote: Human mobility at scale"
+    assert keynote["speakers"] == ["Luca Pappalardo", "Marta C. González"]
+    assert urban["chair"] == "Dino Pedreschi"
+    assert urban["speakers"] == ["Gianni Barlacchi", "Bruno Lepri"]
+    assert health["speakers"] == ["Filippo Simini"]
+    assert health["details"] == "Short talks on epidemics and mobility data."
+    assert closing["speakers"] == [] and closing["details"] == ""
+
+
+def test_parse_without_day_headers_or_sessions():
+    extractor = ProgramExtractor("unused", persist=False)
+    days = extractor.parse(["09:00 Opening", "Ada Lovelace"])["days"]
+    assert days[0]["title"] == "" and days[0]["sessions"][0]["speakers"] == ["Ada Lovelace"]
+    # Prose, like a paper's text, yields nothing
+    assert extractor.parse(["Abstract", "Human mobility follows patterns.", "Monday."])["days"] == []
+
+
+def test_extract_from_pdf_is_cached_by_digest(tmp_path):
+    pytest.importorskip("pypdf")
+    pdf = tmp_path / "program.pdf"
+    write_pdf(pdf, [SCHEDULE])
+    extractor = ProgramExtractor(tmp_path / "cache")
+    schedule = extractor.extract(pdf, "digest")
+    assert sum(len(day["sessions"]) for day in schedule["days"]) == 6
+    assert json.loads((tmp_path / "cache" / f"digest-v{ProgramExtractor.VERSION}.json").read_text()) == schedule
+
+    # A new extractor reuses the cached result without reading the PDF
+    fresh = ProgramExtractor(tmp_path / "cache")
+    fresh.read_lines = lambda path: pytest.fail("the PDF was parsed again")
+    assert fresh.extract(pdf, "digest") == schedule
+
+
+def test_documents_without_a_schedule_are_read_only_partly(tmp_path):
+    pytest.importorskip("pypdf")
+    pdf = tmp_path / "paper.pdf"
+    write_pdf(pdf, [["Page one of a paper"], ["Page two"], ["09:00 Page three looks like a session"]])
+    extractor = ProgramExtractor(tmp_path / "cache", persist=False)
+    assert extractor.read_lines(pdf) == ["Page one of a paper", "Page two"]
+    assert extractor.extract(pdf, "paper") == {"days": []}
@@ -0,0 +1,43 @@
+from sitegen.purge import SelectorUsage, css_blocks, purge_css
+
+
+def usage_of(html, script=""):
+    usage = SelectorUsage()
+    usage.feed(html)
+    usage.close()
+    if script:
+        usage.add_script(script)
+    return usage
+
+
+def test_css_blocks_skip_braces_in_strings_and_comments():
+    css = '/* a { */ .a{content:"}"} @import url(x.css); @media print{.b{color:red}}'
+    assert css_blocks(css) == [
+        (".a", 'content:"}"'),
+        ("@import url(x.css)", None),
+        ("@media print", ".b{color:red}"),
+    ]
+
+
+def test_unused_rules_are_dropped():
+    usage = usage_of('<div class="card" id="main"><p data-x="1">hi</p></div>')
+    css = (".card{a:1}.modal{a:2}#main{a:3}#other{a:4}p[data-x]{a:5}p[data-y]{a:6}"
+           ".card:not(.show){a:7}h1,.card p{a:8}")
+    assert purge_css(css, usage) == ".card{a:1}#main{a:3}p[data-x]{a:5}.card:not(.show){a:7}.card p{a:8}"
+
+
+def test_media_queries_safelist_and_scripts():
+    usage = usage_of('<div class="row"></div>', script="el.classList.add('is-open')")
+    css = "@media (min-width:1px){.row{a:1}.col{a:2}}@media print{.col{a:3}}.is-open{a:4}.modal-dialog{a:5}"
+    assert purge_css(css, usage, safelist=["modal-*"]) == \
+        "@media (min-width:1px){.row{a:1}}.is-open{a:4}.modal-dialog{a:5}"
+
+
+def test_keyframes_and_fonts_follow_their_users():
+    usage = usage_of('<i class="spin"></i>')
+    css = ("/*! licence */@keyframes spin{to{a:1}}@keyframes fade{to{a:0}}"
+           "@font-face{font-family:\"Icons\";src:url(i.woff2)}@font-face{font-family:Unused;src:url(u.woff2)}"
+           ".spin{animation:spin 1s;font-family:Icons}.fade{animation:fade 1s}")
+    assert purge_css(css, usage) == ("/*! licence */@keyframes spin{to{a:1}}"
+                                     "@font-face{font-family:\"Icons\";src:url(i.woff2)}"
+                                     ".spin{animation:spin 1s;font-family:Icons}")
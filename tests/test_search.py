@@ -0,0 +1,53 @@
+import json
+
+from sitegen.search import SearchIndex, fold_text, search_tokens, slugify, unique_slugs
+
+
+def test_folding_and_slugs():
+    assert fold_text("Łukasz Müller") == "lukasz muller"
+    assert search_tokens("Márton Karsai, ISI") == ["marton", "karsai", "isi"]
+    assert slugify("Søren Østergaard") == "soren-ostergaard"
+
+
+def test_unique_slugs():
+    slugs = unique_slugs(["Ana Li", "Ana  Li", "Bo"])
+    assert len(set(slugs)) == 3
+    assert slugs[0] == "ana-li" and slugs[2] == "bo"
+
+
+def load(files):
+    meta = json.loads(files["index.json"])
+    shards = {key: json.loads(files[name]) for key, name in meta["shards"].items()}
+    docs = [doc for name in meta["docs"] for doc in json.loads(files[name])]
+    return meta, shards, docs
+
+
+def test_index_files():
+    index = SearchIndex()
+    index.add("person", "Márton Karsai", "people/marton-karsai/", "ISI")
+    index.add("person", "Marta González", "people/marta-gonzalez/", "MIT")
+    index.add("session", "Mobility keynote", "index.html#session-1", extra=["Marta González"])
+    files = index.files()
+    meta, shards, docs = load(files)
+
+    assert meta["count"] == 3 and meta["prefix"] == 1
+    assert docs[0] == ["person", "Márton Karsai", "people/marton-karsai/", "ISI"]
+    terms = shards["m"]["terms"]
+    assert terms == sorted(terms)
+    # Postings are delta-encoded document ids
+    postings = shards["m"]["postings"][terms.index("marta")]
+    assert postings == [1, 1]
+    # Every file but index.json is named after its content
+    assert all(name == "index.json" or name.split(".")[-2] for name in files)
+    assert files == SearchIndex.files(index)
+
+
+def test_index_splits_documents_and_widens_shards():
+    index = SearchIndex()
+    for i in range(SearchIndex.wide_shards_from):
+        index.add("person", f"Person {i}", f"p/{i}/")
+    meta, shards, docs = load(index.files())
+    assert meta["prefix"] == 2
+    assert len(meta["docs"]) == SearchIndex.wide_shards_from // SearchIndex.docs_per_file
+    assert len(docs) == SearchIndex.wide_shards_from
+    assert "pe" in shards
@@ -0,0 +1,156 @@
+import functools
+import gzip
+import http.client
+import http.server
+import threading
+
+import pytest
+
+from sitegen.assets import brotli, compress_bytes
+from sitegen.server import DevRequestHandler, LiveReload, MemoryOutput
+
+PAGE = b"<html><body><p>" + b"symposium " * 200 + b"</p></body></html>"
+STYLE = b"body { color: teal; }\n" * 100
+
+
+class QuietHandler(DevRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def serve():
+    """Start a dev server on an ephemeral port; returns a function making GET requests to it"""
+    servers = []
+
+    def start(**options):
+        handler = functools.partial(QuietHandler, **options)
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True).start()
+        servers.append(server)
+
+        def get(path, encoding=None):
+            connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+            headers = {"Accept-Encoding": encoding} if encoding is not None else {}
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            body = response.read()
+            connection.close()
+            return response, body
+
+        return get
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def decode(response, body):
+    encoding = response.getheader("Content-Encoding")
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "br":
+        return brotli.decompress(body)
+    assert encoding is None
+    return body
+
+
+@pytest.fixture
+def site_dir(tmp_path):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "index.html").write_bytes(PAGE)
+    (tmp_path / "docs" / "index.html").write_bytes(PAGE)
+    (tmp_path / "css" / "style.css").write_bytes(STYLE)
+    for encoding, suffix in (("gzip", ".gz"), ("br", ".br")):
+        if encoding == "br" and brotli is None:
+            continue
+        (tmp_path / "css" / f"style.css{suffix}").write_bytes(compress_bytes(STYLE, encoding))
+        (tmp_path / f"index.html{suffix}").write_bytes(compress_bytes(PAGE, encoding))
+    return tmp_path
+
+
+@pytest.fixture
+def memory(site_dir):
+    output = MemoryOutput()
+    output.begin()
+    for path in site_dir.rglob("*"):
+        if path.is_file():
+            name = path.relative_to(site_dir).as_posix()
+            # Assets are linked to their sources, pages are held as bytes
+            if name.startswith("css/"):
+                output.link(name, path)
+            else:
+                output.write(name, path.read_bytes())
+    output.commit()
+    return output
+
+
+@pytest.fixture(params=["disk", "memory"])
+def options(request, site_dir, memory):
+    if request.param == "disk":
+        return {"directory": str(site_dir)}
+    return {"directory": str(site_dir / "missing"), "memory": memory}
+
+
+NEGOTIATION = [
+    ("br, gzip", "br"),
+    ("gzip, deflate", "gzip"),
+    ("gzip;q=0, br;q=0", None),
+    ("identity", None),
+    (None, None),
+    ("*", "br"),
+]
+
+
+@pytest.mark.parametrize("accept, expected", NEGOTIATION)
+def test_precompressed_variants_are_negotiated(serve, options, accept, expected):
+    if expected == "br" and brotli is None:
+        expected = "gzip"
+    get = serve(**options)
+    for path, content in (("/css/style.css", STYLE), ("/", PAGE), ("/index.html", PAGE)):
+        response, body = get(path, accept)
+        assert response.status == 200
+        assert response.getheader("Content-Encoding") == expected
+        assert response.getheader("Vary") == "Accept-Encoding"
+        assert int(response.getheader("Content-Length")) == len(body)
+        assert decode(response, body) == content
+
+
+def test_content_type_is_the_uncompressed_type(serve, options):
+    response, _ = serve(**options)("/css/style.css", "gzip")
+    assert response.getheader("Content-Type") == "text/css"
+
+
+def test_missing_files_are_404(serve, options):
+    get = serve(**options)
+    for path in ("/nope.html", "/css/nope.css", "/css/style.css.zst"):
+        response, _ = get(path, "gzip")
+        assert response.status == 404
+
+
+def test_directories_redirect_to_a_trailing_slash(serve, options):
+    get = serve(**options)
+    response, _ = get("/docs", "gzip")
+    assert response.status == 301
+    assert response.getheader("Location") == "/docs/"
+    response, body = get("/docs/", "gzip")
+    assert response.status == 200 and decode(response, body) == PAGE
+
+
+def test_live_reload_script_is_injected_into_pages(serve, options):
+    get = serve(livereload=LiveReload(), **options)
+    response, body = get("/", "gzip")
+    page = decode(response, body)
+    assert page.endswith(DevRequestHandler.RELOAD_SCRIPT + b"</body></html>")
+    assert page.replace(DevRequestHandler.RELOAD_SCRIPT, b"") == PAGE
+
+    # Other files are still served precompressed and unchanged
+    response, body = get("/css/style.css", "gzip")
+    assert response.getheader("Content-Encoding") == "gzip" and decode(response, body) == STYLE
+
+
+def test_without_live_reload_there_is_no_event_stream(serve, options):
+    response, _ = serve(**options)(DevRequestHandler.EVENTS_PATH)
+    assert response.status == 404
@@ -0,0 +1,43 @@
+import threading
+
+import pytest
+
+from sitegen.tasks import TaskGraph
+
+
+def test_tasks_receive_dependency_results():
+    graph = TaskGraph(jobs=4)
+    graph.add("a", lambda: 1)
+    graph.add("b", lambda: 2)
+    graph.add("sum", lambda a, b: a + b, deps=["a", "b"])
+    graph.add("double", lambda total: total * 2, deps=["sum"])
+    assert graph.run() == {"a": 1, "b": 2, "sum": 3, "double": 6}
+
+
+def test_independent_tasks_run_in_parallel():
+    barrier = threading.Barrier(2, timeout=5)
+    graph = TaskGraph(jobs=2)
+    # Each task waits for the other, so this only finishes when both run at once
+    graph.add("left", barrier.wait)
+    graph.add("right", barrier.wait)
+    assert set(graph.run()) == {"left", "right"}
+
+
+def test_dependencies_must_be_registered_first():
+    graph = TaskGraph()
+    graph.add("a", lambda: None)
+    with pytest.raises(ValueError):
+        graph.add("a", lambda: None)
+    with pytest.raises(ValueError):
+        graph.add("b", lambda x: x, deps=["missing"])
+
+
+def test_task_errors_propagate():
+    def fail():
+        raise RuntimeError("boom")
+
+    graph = TaskGraph(jobs=2)
+    graph.add("fail", fail)
+    graph.add("after", lambda _: None, deps=["fail"])
+    with pytest.raises(RuntimeError, match="boom"):
+        graph.run()